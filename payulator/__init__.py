@@ -1,6 +1,10 @@
 from .constants import *
 from .helpers import *
+from .schedule import *
 from .loan import *
+from .loan_book import *
+from .cache import *
+from .simulation import *
 from .loan_contract import *
 
 
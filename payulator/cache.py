@@ -0,0 +1,310 @@
+"""
+Module defining the ScheduleCache class, an opt-in on-disk cache of
+the payment schedules of Loans.
+"""
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+import pathlib as pl
+import datetime as dt
+from collections import namedtuple
+from dataclasses import fields
+from typing import Literal, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .loan import Loan
+from .schedule import SCHEDULE_DTYPES, Schedule
+
+
+#: Hit and miss statistics of a :class:`ScheduleCache`, in the spirit of
+#: ``functools.lru_cache``
+CacheInfo = namedtuple(
+    "CacheInfo",
+    ["hits", "misses", "evictions", "num_entries", "num_bytes", "max_bytes"],
+)
+
+
+def _library_version() -> str:
+    # Import here, since the package finishes importing after this module
+    from . import __version__
+
+    return __version__
+
+
+def _encode(d: dict) -> dict:
+    """
+    Make the summary items of the output of :meth:`Loan.payments`
+    JSON-serializable, encoding dates in ISO format.
+    """
+
+    def encode(v):
+        if isinstance(v, dict):
+            return {k: encode(x) for k, x in v.items()}
+        elif isinstance(v, dt.date):
+            return v.isoformat()
+        elif isinstance(v, np.generic):
+            return v.item()
+        else:
+            return v
+
+    return {k: encode(v) for k, v in d.items()}
+
+
+def _decode(d: dict) -> dict:
+    """
+    Invert :func:`_encode`.
+    """
+
+    def decode(v):
+        if isinstance(v, dict):
+            return {k: decode(x) for k, x in v.items()}
+        elif v is None:
+            return v
+        else:
+            return dt.date.fromisoformat(v)
+
+    return {
+        k: decode(v) if k in ["first_payment_date", "last_payment_date"] else v
+        for k, v in d.items()
+    }
+
+
+class ScheduleCache:
+    """
+    An opt-in, persistent, on-disk cache of the payment schedules and
+    summaries output by :meth:`Loan.payments`, shared by all processes
+    pointing at the same cache directory.
+
+    Each entry is keyed by :meth:`key`, a stable hash of the true fields
+    of the Loan, the arguments of :meth:`Loan.payments`, and the library version,
+    and is stored as a directory of one ``.npy`` file per payment schedule
+    column and a JSON file of the remaining items.
+    Cache hits in array output are served via memory-mapped, read-only arrays
+    without copying.
+
+    The cache is bounded by ``max_bytes``, evicting least recently
+    used entries, by file modification time, when storing an entry would
+    exceed that bound.
+    Hit and miss statistics of this instance are available via
+    :meth:`cache_info`.
+    """
+
+    def __init__(
+        self, cache_dir: Union[str, pl.Path], max_bytes: int = 2**30
+    ) -> None:
+        self.cache_dir = pl.Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __repr__(self) -> str:
+        return f"ScheduleCache(cache_dir={str(self.cache_dir)!r}, max_bytes={self.max_bytes})"
+
+    @staticmethod
+    def key(loan: Loan, decimals: Optional[int] = 2, *, exact: bool = False) -> str:
+        """
+        Return the cache key of the given Loan and arguments of
+        :meth:`Loan.payments`, namely the SHA-256 hex digest of their
+        canonical JSON encoding along with the library version.
+        Normalize the Loan true fields by their annotated types first,
+        e.g. money amounts and rates to floats, counts to integers, and dates
+        to ISO format, so that equal Loans have equal keys.
+        """
+        params = {}
+        for f in fields(loan):
+            if not f.init:
+                continue
+            v = getattr(loan, f.name)
+            if f.type is dt.date:
+                v = dt.date.isoformat(v)
+            elif f.type in [str, int, float]:
+                v = f.type(v)
+            params[f.name] = v
+        params |= {
+            "decimals": decimals,
+            "exact": exact,
+            "version": _library_version(),
+        }
+        s = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256(s.encode()).hexdigest()
+
+    def _entry_dir(self, key: str) -> pl.Path:
+        return self.cache_dir / key
+
+    def _entries(self) -> list[tuple[float, int, pl.Path]]:
+        """
+        Return a list of (modification time, number of bytes, path) triples
+        of the entries of this cache.
+        """
+        entries = []
+        for d in os.scandir(self.cache_dir):
+            if not d.is_dir() or d.name.startswith("."):
+                continue
+            try:
+                files = list(os.scandir(d.path))
+                entries.append(
+                    (
+                        d.stat().st_mtime,
+                        sum(f.stat().st_size for f in files),
+                        pl.Path(d.path),
+                    )
+                )
+            except FileNotFoundError:
+                # Evicted by another process in the meantime
+                continue
+        return entries
+
+    def get(
+        self,
+        loan: Loan,
+        decimals: Optional[int] = 2,
+        output: Literal["frame", "array"] = "frame",
+        *,
+        exact: bool = False,
+    ) -> Optional[dict]:
+        """
+        Return the cached output of ``loan.payments(decimals, output, exact=exact)``,
+        or ``None`` if there is none.
+        In array output, the payment schedule columns are memory-mapped,
+        read-only arrays.
+        In DataFrame output, they are writable copies with the same dtypes
+        as in the output of :meth:`Loan.payments`.
+        """
+        path = self._entry_dir(self.key(loan, decimals, exact=exact))
+        try:
+            columns = {
+                name: np.load(path / f"{name}.npy", mmap_mode="r").view(np.ndarray)
+                for name in SCHEDULE_DTYPES
+            }
+            with (path / "summary.json").open() as src:
+                d = _decode(json.load(src))
+            # Mark as recently used
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+
+        if output == "array":
+            d["payment_schedule"] = Schedule(**columns)
+        else:
+            # Copy, so that the DataFrame is writable like that of a miss,
+            # and widen the payment sequence to the int64 of Loan.payments
+            columns = {
+                name: a.astype(np.int64 if name == "payment_sequence" else a.dtype)
+                for name, a in columns.items()
+            }
+            d["payment_schedule"] = pd.DataFrame(
+                columns | {"notes": np.nan}, copy=False
+            )
+        return d
+
+    def put(
+        self,
+        loan: Loan,
+        payments: dict,
+        decimals: Optional[int] = 2,
+        *,
+        exact: bool = False,
+    ) -> None:
+        """
+        Store the given output of ``loan.payments(decimals, exact=exact)``
+        in this cache, evicting least recently used entries as needed.
+        Entries are written to a temporary directory and then renamed,
+        so that readers never see partial entries.
+        """
+        key = self.key(loan, decimals, exact=exact)
+        path = self._entry_dir(key)
+        if path.exists():
+            return
+
+        f = payments["payment_schedule"]
+        if not isinstance(f, Schedule):
+            f = Schedule(**{name: f[name].to_numpy() for name in SCHEDULE_DTYPES})
+        tmp = pl.Path(tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_dir))
+        try:
+            for name in SCHEDULE_DTYPES:
+                np.save(tmp / f"{name}.npy", f[name])
+            with (tmp / "summary.json").open("w") as tgt:
+                json.dump(
+                    _encode(
+                        {k: v for k, v in payments.items() if k != "payment_schedule"}
+                    ),
+                    tgt,
+                )
+            os.replace(tmp, path)
+        except OSError:
+            # Another process stored the same entry in the meantime
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        Remove least recently used entries until this cache fits within
+        ``max_bytes``.
+        """
+        entries = sorted(self._entries(), key=lambda x: x[0])
+        num_bytes = sum(x[1] for x in entries)
+        for __, size, path in entries:
+            if num_bytes <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            num_bytes -= size
+            with self._lock:
+                self._evictions += 1
+
+    def payments(
+        self,
+        loan: Loan,
+        decimals: Optional[int] = 2,
+        output: Literal["frame", "array"] = "frame",
+        *,
+        exact: bool = False,
+    ) -> dict:
+        """
+        Return ``loan.payments(decimals, output, exact=exact)``,
+        from this cache if possible, else computing and storing it.
+        """
+        d = self.get(loan, decimals, output, exact=exact)
+        if d is None:
+            d = loan.payments(decimals, output, exact=exact)
+            self.put(loan, d, decimals, exact=exact)
+        return d
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Return the hit, miss, and eviction counts of this instance, and the
+        number of entries and bytes currently in the cache directory.
+        """
+        entries = self._entries()
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                len(entries),
+                sum(x[1] for x in entries),
+                self.max_bytes,
+            )
+
+    def clear(self) -> None:
+        """
+        Remove all entries of this cache and reset its statistics.
+        """
+        for __, __, path in self._entries():
+            shutil.rmtree(path, ignore_errors=True)
+        with self._lock:
+            self._hits = self._misses = self._evictions = 0
@@ -1,5 +1,7 @@
 import os
 import pathlib as pl
+from types import MappingProxyType
+
 import numpy as np
 
 
@@ -16,6 +18,10 @@ NUM_BY_FREQ = {
     "daily": 365,
     "continuously": np.inf,
 }
+#: Read-only version of :const:`NUM_BY_FREQ` without the ``"continuously"`` option
+NUM_BY_DISCRETE_FREQ = MappingProxyType(
+    {k: v for k, v in NUM_BY_FREQ.items() if k != "continuously"}
+)
 NOUN_BY_FREQ = {
     "annually": "annum",
     "semiannually": "semiannum",
@@ -1,7 +1,9 @@
 import math
-from copy import copy
+import numbers
+import functools
 import datetime as dt
-from typing import Union, Optional
+from types import MappingProxyType
+from typing import Iterable, Union, Optional, TYPE_CHECKING
 
 import numpy as np
 import pandas as pd
@@ -9,6 +11,9 @@ from pandas import DataFrame
 
 from . import constants as cs
 
+if TYPE_CHECKING:
+    from .loan import Loan
+
 
 def freq_to_num(freq: str, *, allow_cts: bool = False) -> Union[int, float]:
     """
@@ -17,10 +22,7 @@ def freq_to_num(freq: str, *, allow_cts: bool = False) -> Union[int, float]:
     If not ``allow_cts``, then remove the ``"continuouly"`` option.
     Raise a ``ValueError`` in case of no frequency match.
     """
-    d = copy(cs.NUM_BY_FREQ)
-    if not allow_cts:
-        del d["continuously"]
-
+    d = cs.NUM_BY_FREQ if allow_cts else cs.NUM_BY_DISCRETE_FREQ
     try:
         return d[freq]
     except KeyError:
@@ -29,6 +31,18 @@ def freq_to_num(freq: str, *, allow_cts: bool = False) -> Union[int, float]:
         )
 
 
+#: Number of occurrences per year -> period as a Pandas DateOffset;
+#: built once, since DateOffsets are immutable
+_DATE_OFFSET_BY_NUM = MappingProxyType(
+    {k: pd.DateOffset(months=12 // k) for k in [1, 2, 3, 4, 6, 12]}
+    | {
+        26: pd.DateOffset(weeks=2),
+        52: pd.DateOffset(weeks=1),
+        365: pd.DateOffset(days=1),
+    }
+)
+
+
 def to_date_offset(num_per_year: int) -> Union[pd.DateOffset, None]:
     """
     Convert the given number of occurrences per year to its
@@ -37,39 +51,127 @@ def to_date_offset(num_per_year: int) -> Union[pd.DateOffset, None]:
     Return ``None`` if num_per_year is not one of
     ``[1, 2, 3, 4, 6, 12, 26, 52, 365]``.
     """
-    k = num_per_year
-    if k in [1, 2, 3, 4, 6, 12]:
-        d = pd.DateOffset(months=12 // k)
-    elif k == 26:
-        d = pd.DateOffset(weeks=2)
-    elif k == 52:
-        d = pd.DateOffset(weeks=1)
-    elif k == 365:
-        d = pd.DateOffset(days=1)
-    else:
-        d = None
-    return d
+    return _DATE_OFFSET_BY_NUM.get(num_per_year)
 
 
-def compute_period_interest_rate(
+def shift_dates(
+    dates: np.ndarray, num_per_year: np.ndarray, num_periods: np.ndarray
+) -> np.ndarray:
+    """
+    Given an array of dates (coerced to NumPy ``datetime64[D]``),
+    an array of numbers of occurrences per year
+    (each one of ``[1, 2, 3, 4, 6, 12, 26, 52, 365]``),
+    and an array of integer numbers of periods, all broadcastable
+    against one another, add the given number of periods to each date.
+    Return the resulting array of NumPy ``datetime64[D]`` dates.
+
+    Does the same as ``pd.Timestamp(date) + num * to_date_offset(k)``,
+    but vectorized: uses month arithmetic for the monthly multiples
+    1--12, clamping days to month ends, and day steps for 26, 52, and 365.
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    k = np.asarray(num_per_year).astype(np.int64)
+    j = np.asarray(num_periods).astype(np.int64)
+    is_monthly = np.isin(k, [1, 2, 3, 4, 6, 12])
+    months = np.where(is_monthly, 12 // np.where(is_monthly, k, 1) * j, 0)
+    days = np.select([k == 26, k == 52, k == 365], [14 * j, 7 * j, j], 0)
+
+    month = dates.astype("datetime64[M]")
+    day = (dates - month.astype("datetime64[D]")).astype(np.int64)
+    new_month = month + months
+    month_start = new_month.astype("datetime64[D]")
+    month_len = ((new_month + 1).astype("datetime64[D]") - month_start).astype(np.int64)
+    return month_start + np.minimum(day, month_len - 1) + days
+
+
+def build_payment_dates(
+    first_payment_date: dt.date, num_per_year: int, num_payments: int
+) -> np.ndarray:
+    """
+    Return the NumPy ``datetime64[D]`` array of the ``num_payments`` payment
+    dates starting at the given first payment date and occurring
+    ``num_per_year`` times a year.
+    See :func:`shift_dates`.
+    """
+    return shift_dates(first_payment_date, num_per_year, np.arange(num_payments))
+
+
+@functools.lru_cache(maxsize=4096)
+def _compute_period_interest_rate(
     interest_rate: float, compounding_freq: str, payment_freq: str
 ) -> float:
+    """
+    Scalar version of :func:`compute_period_interest_rate`, memoized in
+    a bounded LRU cache keyed by the arguments.
+    """
+    i = interest_rate
+    j = freq_to_num(compounding_freq, allow_cts=True)
+    k = freq_to_num(payment_freq)
+
+    if np.isinf(j):
+        return math.exp(i / k) - 1
+    else:
+        return (1 + i / j) ** (j / k) - 1
+
+
+def compute_period_interest_rate(
+    interest_rate: Union[float, np.ndarray], compounding_freq: str, payment_freq: str
+) -> Union[float, np.ndarray]:
     """
     Compute the interest rate per payment period given
     an annual interest rate, a compounding frequency, and a payment
     freq.
     See the function :func:`freq_to_num` for acceptable frequencies.
+    The interest rate can also be an array of rates, in which case return
+    the array of corresponding period interest rates.
+
+    Results for scalar interest rates are memoized in a bounded LRU cache
+    keyed by the arguments; call ``compute_period_interest_rate.cache_info()``
+    for hit and miss statistics and ``compute_period_interest_rate.cache_clear()``
+    to reset it.
     """
-    i = interest_rate
+    if isinstance(interest_rate, numbers.Real):
+        return _compute_period_interest_rate(
+            interest_rate, compounding_freq, payment_freq
+        )
+
+    i = np.asarray(interest_rate, dtype=float)
     j = freq_to_num(compounding_freq, allow_cts=True)
     k = freq_to_num(payment_freq)
 
     if np.isinf(j):
-        return math.exp(i / k) - 1
+        return np.exp(i / k) - 1
     else:
         return (1 + i / j) ** (j / k) - 1
 
 
+compute_period_interest_rate.cache_info = _compute_period_interest_rate.cache_info
+compute_period_interest_rate.cache_clear = _compute_period_interest_rate.cache_clear
+
+
+def _freqs_to_nums(freqs: np.ndarray, *, allow_cts: bool = False) -> np.ndarray:
+    """
+    Vectorized version of :func:`freq_to_num`.
+    Map each distinct frequency name only once.
+    """
+    uniq, inv = np.unique(np.asarray(freqs, dtype=str), return_inverse=True)
+    nums = np.array([freq_to_num(f, allow_cts=allow_cts) for f in uniq], dtype=float)
+    return nums[inv].reshape(np.shape(freqs))
+
+
+def _period_interest_rates(
+    interest_rate: np.ndarray, j: np.ndarray, k: np.ndarray
+) -> np.ndarray:
+    """
+    Vectorized version of :func:`compute_period_interest_rate`
+    for annual interest rates, compounding numbers per year ``j``,
+    and payment numbers per year ``k``.
+    """
+    i = interest_rate
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        return np.where(np.isinf(j), np.exp(i / k) - 1, (1 + i / j) ** (j / k) - 1)
+
+
 def build_principal_fn(
     principal: float,
     interest_rate: float,
@@ -80,21 +182,45 @@ def build_principal_fn(
     """
     Compute the remaining loan principal, the loan balance,
     as a function of the number of payments made.
-    Return the resulting function.
+    Return the resulting function, which also accepts a NumPy array
+    of numbers of payments made and then returns the array of
+    corresponding balances.
+    See :func:`_principal_balances`.
     """
     P = principal
     I = compute_period_interest_rate(interest_rate, compounding_freq, payment_freq)
     n = num_payments
 
     def p(t):
-        if I == 0:
-            return P - t * P / n
-        else:
-            return P * (1 - ((1 + I) ** t - 1) / ((1 + I) ** n - 1))
+        b = _principal_balances(P, I, n, t)
+        return b.item() if b.ndim == 0 else b
 
     return p
 
 
+def compute_principal_balances(
+    principal: float,
+    interest_rate: float,
+    compounding_freq: str,
+    payment_freq: str,
+    num_payments: int,
+    t: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Evaluate the principal function of :func:`build_principal_fn` on the given
+    array ``t`` of numbers of payments made, all at once.
+    If ``t`` is ``None``, then use ``t = 0, 1, ..., num_payments``,
+    which yields the loan balance before each payment followed by
+    the final balance of 0.
+    Return the resulting NumPy array of floats.
+    """
+    if t is None:
+        t = np.arange(num_payments + 1)
+
+    I = compute_period_interest_rate(interest_rate, compounding_freq, payment_freq)
+    return _principal_balances(principal, I, num_payments, t)
+
+
 def amortize(
     principal: float,
     interest_rate: float,
@@ -125,32 +251,482 @@ def amortize(
     - https://en.wikipedia.org/wiki/Amortization_calculator
     - https://www.vertex42.com/ExcelArticles/amortization-calculation.html
     """
-    P = principal
     I = compute_period_interest_rate(interest_rate, compounding_freq, payment_freq)
-    n = num_payments
-    if I == 0:
-        A = P / n
+    return _amortized_payments(principal, I, num_payments).item()
+
+
+def _annual_interest_rates(
+    period_interest_rate: np.ndarray, j: np.ndarray, k: np.ndarray
+) -> np.ndarray:
+    """
+    Inverse of :func:`_period_interest_rates`: given interest rates per payment
+    period, compounding numbers per year ``j``, and payment numbers per year
+    ``k``, return the corresponding nominal annual interest rates.
+    """
+    I = period_interest_rate
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        return np.where(np.isinf(j), k * np.log1p(I), j * ((1 + I) ** (k / j) - 1))
+
+
+def _annuity_factors(I: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """
+    Return the present values of ``n`` payments of 1 at the period
+    interest rates ``I``, namely ``(1 - (1 + I)**(-n)) / I``, or ``n`` if
+    ``I == 0``, accurately for small ``I``.
+    """
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        return np.where(I == 0, n, -np.expm1(-n * np.log1p(I)) / I)
+
+
+def _amortized_payments(P: np.ndarray, I: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of :func:`amortize`, and its implementation,
+    for principals ``P``, period interest rates ``I``, and numbers of
+    payments ``n``, namely ``P * I / (1 - (1 + I)**(-n))``, or ``P / n``
+    if ``I == 0``, or 0 if ``n == 0``.
+    """
+    P, I, n = (np.asarray(x, dtype=float) for x in (P, I, n))
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        return np.where(
+            n == 0, 0.0, np.where(I == 0, P / n, P * I / (1 - (1 + I) ** (-n)))
+        )
+
+
+def _principal_balances(
+    P: np.ndarray, I: np.ndarray, n: np.ndarray, t: np.ndarray
+) -> np.ndarray:
+    """
+    Vectorized version of the principal function of :func:`build_principal_fn`,
+    and its implementation, for principals ``P``, period interest rates ``I``,
+    and numbers of payments ``n``, evaluated at the numbers of payments
+    made ``t``, all broadcastable against one another.
+    Return ``P`` where ``n == 0``, that is, where nothing is amortized.
+    """
+    P, I, n, t = (np.asarray(x, dtype=float) for x in (P, I, n, t))
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        return np.where(
+            n == 0,
+            P,
+            np.where(
+                I == 0,
+                P - t * P / n,
+                P * (1 - ((1 + I) ** t - 1) / ((1 + I) ** n - 1)),
+            ),
+        )
+
+
+def solve_principal(
+    payment: Union[float, np.ndarray],
+    interest_rate: Union[float, np.ndarray],
+    compounding_freq: Union[str, np.ndarray],
+    payment_freq: Union[str, np.ndarray],
+    num_payments: Union[int, np.ndarray],
+) -> np.ndarray:
+    """
+    Inverse of :func:`amortize` with respect to the principal.
+    Given periodic payment amounts and the remaining loan parameters of
+    :func:`amortize`, each a scalar or an array, all broadcastable against one
+    another, return the array of principals whose amortized periodic payments
+    are the given payments.
+    Uses the closed form ``P = A * (1 - (1 + I)**(-n)) / I``, where ``I`` is
+    the period interest rate of :func:`compute_period_interest_rate`.
+    """
+    k = _freqs_to_nums(payment_freq)
+    j = _freqs_to_nums(compounding_freq, allow_cts=True)
+    I = _period_interest_rates(np.asarray(interest_rate, dtype=float), j, k)
+    return np.asarray(payment, dtype=float) * _annuity_factors(
+        I, np.asarray(num_payments, dtype=float)
+    )
+
+
+def solve_num_payments(
+    principal: Union[float, np.ndarray],
+    payment: Union[float, np.ndarray],
+    interest_rate: Union[float, np.ndarray],
+    compounding_freq: Union[str, np.ndarray],
+    payment_freq: Union[str, np.ndarray],
+) -> np.ndarray:
+    """
+    Inverse of :func:`amortize` with respect to the number of payments.
+    Given principals, periodic payment amounts, and the remaining loan
+    parameters of :func:`amortize`, each a scalar or an array, all
+    broadcastable against one another, return the array of (fractional)
+    numbers of payments that amortize the principals with the given payments.
+    Take their ceilings to get the minimum terms.
+    Uses the closed form ``n = -log(1 - P * I / A) / log(1 + I)``, where ``I``
+    is the period interest rate of :func:`compute_period_interest_rate`.
+    The result is infinite where the payment does not exceed the interest
+    ``P * I`` of the first period.
+    """
+    P = np.asarray(principal, dtype=float)
+    A = np.asarray(payment, dtype=float)
+    k = _freqs_to_nums(payment_freq)
+    j = _freqs_to_nums(compounding_freq, allow_cts=True)
+    I = _period_interest_rates(np.asarray(interest_rate, dtype=float), j, k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(
+            I == 0,
+            P / A,
+            np.where(A > P * I, -np.log1p(-P * I / A) / np.log1p(I), np.inf),
+        )
+
+
+def solve_interest_rate(
+    principal: Union[float, np.ndarray],
+    payment: Union[float, np.ndarray],
+    compounding_freq: Union[str, np.ndarray],
+    payment_freq: Union[str, np.ndarray],
+    num_payments: Union[int, np.ndarray],
+    tol: float = 1e-12,
+    max_iter: int = 100,
+) -> np.ndarray:
+    """
+    Inverse of :func:`amortize` with respect to the interest rate.
+    Given principals, periodic payment amounts, and the remaining loan
+    parameters of :func:`amortize`, each a scalar or an array, all
+    broadcastable against one another, return the array of nominal annual
+    interest rates, compounded at the given compounding frequencies, whose
+    amortized periodic payments are the given payments.
+
+    Solve for the period interest rates by batched Newton iterations on the
+    annuity equation ``P = A * (1 - (1 + I)**(-n)) / I``, safeguarded by
+    bisection within the bracket ``[0, A / P]``, which contains the root,
+    iterating only on the unconverged entries until their relative steps
+    fall below ``tol`` or for at most ``max_iter`` iterations.
+    Then convert them to annual rates, inverting
+    :func:`compute_period_interest_rate`.
+    The result is 0 where the total of payments ``n * A`` equals the
+    principal up to a relative tolerance of ``1e-12``, and NaN where it is
+    less than the principal, since that would need a negative interest rate.
+    """
+    P, A, n = np.broadcast_arrays(
+        np.asarray(principal, dtype=float),
+        np.asarray(payment, dtype=float),
+        np.asarray(num_payments, dtype=float),
+    )
+    k = _freqs_to_nums(payment_freq)
+    j = _freqs_to_nums(compounding_freq, allow_cts=True)
+    shape = np.broadcast_shapes(P.shape, k.shape, j.shape)
+    P, A, n = (np.broadcast_to(x, shape).ravel() for x in (P, A, n))
+
+    # Bracket the root and start from the small rate approximation
+    lo = np.zeros_like(P)
+    hi = A / P
+    I = np.clip(2 * (n * A - P) / (P * (n + 1)), 0, hi / 2)
+    # Treat payment totals within rounding error of the principal as zero rates
+    is_zero = np.isclose(n * A, P, rtol=1e-12, atol=0)
+    active = (n * A > P) & ~is_zero
+
+    for __ in range(max_iter):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        I_, P_, A_, n_ = I[idx], P[idx], A[idx], n[idx]
+
+        # Excess of the principal over the present value of the payments,
+        # increasing in I, and its derivative
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            a = _annuity_factors(I_, n_)
+            h = P_ - A_ * a
+            dh = -A_ * (n_ * (1 + I_) ** (-n_ - 1) - a) / I_
+
+        lo[idx] = np.where(h < 0, I_, lo[idx])
+        hi[idx] = np.where(h < 0, hi[idx], I_)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            I_new = I_ - h / dh
+        # Fall back to bisection where Newton leaves the bracket
+        ok = np.isfinite(I_new) & (I_new > lo[idx]) & (I_new < hi[idx])
+        I_new = np.where(ok, I_new, (lo[idx] + hi[idx]) / 2)
+        I[idx] = I_new
+        active[idx] = np.abs(I_new - I_) > tol * (1 + I_new)
+
+    I = np.where(is_zero, 0.0, np.where(n * A > P, I, np.nan))
+    return _annual_interest_rates(I.reshape(shape), j, k)
+
+
+def compute_irrs(
+    principal: Union[float, np.ndarray],
+    payments: np.ndarray,
+    offsets: Optional[np.ndarray] = None,
+    tol: float = 1e-12,
+    max_iter: int = 100,
+) -> np.ndarray:
+    """
+    Compute the internal rates of return per payment period of many loans
+    at once, that is, for each loan, the rate ``I`` such that its principal
+    equals the present value ``sum_t c_t * (1 + I)**(-t)`` of its payments
+    ``c_1, c_2, ...``, made one period apart starting one period after
+    the principal is lent.
+
+    Given the principals (a scalar or an array of one per loan) and the
+    payments of the loans as either
+
+    - a 2-D array of one row per loan, padded at the end with zeros or NaNs, or
+    - a 1-D ragged array along with integer offsets such that the payments
+      of loan ``i`` occupy the slice ``offsets[i]:offsets[i + 1]``, as in
+      ``LoanBook.schedule_arrays``,
+
+    return the array of rates.
+    Solve by batched Newton iterations, safeguarded by bisection within a
+    bracket of the root, iterating only on the unconverged loans until their
+    relative steps fall below ``tol`` or for at most ``max_iter`` iterations.
+    """
+    payments = np.asarray(payments, dtype=float)
+    if offsets is None:
+        payments = np.atleast_2d(payments)
+        L, T = payments.shape
+        loan = np.repeat(np.arange(L), T)
+        t = np.tile(np.arange(1, T + 1), L)
+        c = np.nan_to_num(payments.ravel())
+    else:
+        offsets = np.asarray(offsets)
+        L = offsets.shape[0] - 1
+        loan = np.repeat(np.arange(L), np.diff(offsets))
+        t = np.arange(offsets[-1]) - offsets[:-1][loan] + 1
+        c = payments
+    P = np.broadcast_to(np.asarray(principal, dtype=float), (L,))
+
+    # Bracket the root: the present value decreases in I from the payment total
+    total = np.bincount(loan, weights=c, minlength=L)
+    lo = np.where(total >= P, 0.0, -0.999999)
+    hi = np.where(total >= P, total / P - 1, 0.0)
+    I = (lo + hi) / 2
+    active = total != P
+
+    for __ in range(max_iter):
+        if not active.any():
+            break
+        # Restrict to the rows of the unconverged loans
+        rows = active[loan]
+        loan_, t_, c_ = loan[rows], t[rows], c[rows]
+        I_ = I[loan_]
+        v = (1 + I_) ** (-t_)
+        f = np.bincount(loan_, weights=c_ * v, minlength=L) - P
+        df = np.bincount(loan_, weights=-t_ * c_ * v / (1 + I_), minlength=L)
+
+        idx = np.flatnonzero(active)
+        f, df, I_ = f[idx], df[idx], I[idx]
+        lo[idx] = np.where(f > 0, I_, lo[idx])
+        hi[idx] = np.where(f > 0, hi[idx], I_)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            I_new = I_ - f / df
+        # Fall back to bisection where Newton leaves the bracket
+        ok = np.isfinite(I_new) & (I_new > lo[idx]) & (I_new < hi[idx])
+        I_new = np.where(ok, I_new, (lo[idx] + hi[idx]) / 2)
+        I[idx] = I_new
+        active[idx] = np.abs(I_new - I_) > tol * (1 + np.abs(I_new))
+
+    return np.where(total == P, 0.0, I)
+
+
+def compute_aprs(
+    principal: Union[float, np.ndarray],
+    payments: np.ndarray,
+    payment_freq: Union[str, np.ndarray],
+    offsets: Optional[np.ndarray] = None,
+    *,
+    effective: bool = False,
+    tol: float = 1e-12,
+    max_iter: int = 100,
+) -> np.ndarray:
+    """
+    Compute the annual percentage rates (APRs), as decimals and not
+    percentages, of many loans at once from their principals and
+    their payments, including fees, given as in :func:`compute_irrs`,
+    along with their payment frequencies.
+    Namely, the APR of a loan is its internal rate of return per payment
+    period times its number of payments per year.
+    If ``effective``, then return the effective annual rates
+    ``(1 + I)**k - 1`` instead.
+    """
+    I = compute_irrs(principal, payments, offsets, tol=tol, max_iter=max_iter)
+    k = _freqs_to_nums(payment_freq)
+    return (1 + I) ** k - 1 if effective else k * I
+
+
+def build_discount_factors(
+    times: np.ndarray,
+    curves: Iterable[Union[float, dict]],
+    compounding_freq: str = "annually",
+) -> np.ndarray:
+    """
+    Given an array of times in years and a list of discount curves, each
+    either a flat annual zero rate or a dictionary of times in years to annual
+    zero rates, compounded at the given frequency (see :func:`freq_to_num`),
+    return the matrix of discount factors of shape ``(len(times), len(curves))``.
+    Interpolate the zero rates of term structures linearly in time,
+    extrapolating them flatly beyond their first and last times.
+    """
+    times = np.asarray(times, dtype=float)
+    j = freq_to_num(compounding_freq, allow_cts=True)
+    rates = []
+    for curve in curves:
+        if isinstance(curve, dict):
+            x = np.array(sorted(curve), dtype=float)
+            y = np.array([curve[t] for t in sorted(curve)], dtype=float)
+            rates.append(np.interp(times, x, y))
+        elif isinstance(curve, numbers.Real):
+            rates.append(np.full(times.shape, float(curve)))
+        else:
+            raise ValueError(
+                "A discount curve must be a flat rate or a dictionary of times "
+                "to rates"
+            )
+    r = np.stack(rates, axis=-1)
+    t = times[..., None]
+    if np.isinf(j):
+        return np.exp(-r * t)
+    else:
+        return (1 + r / j) ** (-j * t)
+
+
+def compute_npvs(
+    payment_dates: np.ndarray,
+    payments: np.ndarray,
+    curves: Iterable[Union[float, dict]],
+    valuation_date: dt.date,
+    offsets: Optional[np.ndarray] = None,
+    compounding_freq: str = "annually",
+) -> np.ndarray:
+    """
+    Compute the net present values at the given valuation date of the
+    remaining payments, that is, those dated after the valuation date,
+    of many loans against many discount curves at once.
+
+    Given the payment dates and payments of the loans as either
+
+    - 2-D arrays of one row per loan, padded at the end with NaTs and
+      zeros or NaNs, respectively, or
+    - 1-D ragged arrays along with integer offsets such that the payments
+      of loan ``i`` occupy the slice ``offsets[i]:offsets[i + 1]``, as in
+      ``LoanBook.schedule_arrays``,
+
+    and discount curves as in :func:`build_discount_factors`, with times
+    in years from the valuation date counted as days over 365,
+    return the matrix of net present values of shape
+    ``(number of loans, len(curves))``.
+    Compute the discount factors only once per unique payment date.
+    """
+    curves = list(curves)
+    dates = np.asarray(payment_dates, dtype="datetime64[D]")
+    payments = np.asarray(payments, dtype=float)
+    if offsets is None:
+        dates = np.atleast_2d(dates)
+        payments = np.atleast_2d(payments)
+        L = dates.shape[0]
+        loan = np.repeat(np.arange(L), dates.shape[1])
+        dates = dates.ravel()
+        payments = np.nan_to_num(payments.ravel())
     else:
-        A = P * I / (1 - (1 + I) ** (-n))
+        offsets = np.asarray(offsets)
+        L = offsets.shape[0] - 1
+        loan = np.repeat(np.arange(L), np.diff(offsets))
+
+    # Keep only the remaining payments
+    keep = dates > np.datetime64(valuation_date, "D")
+    dates, payments, loan = dates[keep], payments[keep], loan[keep]
+
+    # Discount each unique payment date once
+    uniq, inv = np.unique(dates, return_inverse=True)
+    times = (uniq - np.datetime64(valuation_date, "D")).astype(float) / 365
+    df = build_discount_factors(times, curves, compounding_freq)
+
+    npvs = np.empty((L, len(curves)))
+    for c in range(len(curves)):
+        npvs[:, c] = np.bincount(loan, weights=payments * df[inv, c], minlength=L)
+    return npvs
 
-    return A
+
+def to_minor_units(
+    offsets: np.ndarray,
+    beginning_balance: np.ndarray,
+    principal_payment: np.ndarray,
+    interest_payment: np.ndarray,
+    fee_payment: np.ndarray,
+    decimals: int = 2,
+) -> dict:
+    """
+    Given unrounded float payment schedule columns of one or more loans laid
+    out one after the other, with the rows of loan ``i`` in the slice
+    ``offsets[i]:offsets[i + 1]``, convert them exactly into integer minor
+    units, e.g. cents if ``decimals == 2``, in one vectorized pass.
+    Return a dictionary with the int64 arrays
+
+    - ``"beginning_balance"``: beginning balances rounded to minor units
+    - ``"principal_payment"``: differences of consecutive rounded balances,
+      so that the principal payments of each loan sum exactly to its principal
+    - ``"ending_balance"``: the next rounded balance, and 0 at the end of
+      each loan
+    - ``"interest_payment"``: the rounded principal plus interest payment
+      minus the principal payment, so that level payments stay level;
+      on the final payment of each loan, the rounded interest payment,
+      so that the final payment absorbs the rounding residual
+    - ``"fee_payment"``: rounded fee payments
+    - ``"total_payment"``: fee_payment + principal_payment + interest_payment
+
+    """
+    scale = 10**decimals
+
+    def to_int(x):
+        return np.rint(np.asarray(x, dtype=float) * scale).astype(np.int64)
+
+    last = np.asarray(offsets)[1:] - 1
+    beginning_balance = to_int(beginning_balance)
+    ending_balance = np.append(beginning_balance[1:], 0)
+    ending_balance[last] = 0
+    principal_payment_ = beginning_balance - ending_balance
+    interest_payment_ = (
+        to_int(np.asarray(principal_payment) + interest_payment) - principal_payment_
+    )
+    interest_payment_[last] = to_int(np.asarray(interest_payment)[last])
+    fee_payment = to_int(fee_payment)
+
+    return {
+        "beginning_balance": beginning_balance,
+        "principal_payment": principal_payment_,
+        "ending_balance": ending_balance,
+        "interest_payment": interest_payment_,
+        "fee_payment": fee_payment,
+        "total_payment": fee_payment + principal_payment_ + interest_payment_,
+    }
 
 
 def aggregate_payment_schedules(
-    payment_schedules: list[DataFrame],
+    payment_schedules: Iterable[Union[DataFrame, "Loan"]],
     start_date: Optional[dt.date] = None,
     end_date: Optional[dt.date] = None,
     freq: Optional[str] = None,
+    chunk_size: int = 100_000,
+    decimals: Optional[int] = None,
+    *,
+    exact: bool = False,
 ) -> DataFrame:
     """
-    Given a list of payment schedules in the form output by any of the
-    `summarize` methods in the :mod:`loan` module, do the following.
+    Given an iterable (possibly a generator) of payment schedules in the form
+    output by :meth:`Loan.payments` or of Loans, in which case use their
+    payment schedules, do the following.
 
-    1. Concatenate the payment schedules.
-    2. Slice to the given start date and end date (inclusive)
-    3. Group by payment date, and resample at the given Pandas frequency
+    1. Slice the payment schedules to the given start date and end date
+       (inclusive).
+    2. Group by payment date, and resample at the given Pandas frequency
        (and not a frequency in :const:`NUM_BY_FREQ`) by summing.
 
+    Do this incrementally, folding chunks of about ``chunk_size`` payment
+    schedule rows at a time into running per-period sums, so that
+    peak memory use is bounded by the chunk size and the number of
+    output periods rather than the total number of rows.
+
+    If ``decimals`` is given, then round the result once to that many
+    decimal places, so that the payment schedules can be given unrounded,
+    e.g. via ``Loan.payments(decimals=None)``, which is how Loans are
+    handled then; otherwise Loans are handled via their default rounded
+    payment schedules.
+    If furthermore ``exact``, then round each payment to that many decimal
+    places and sum in integer minor units, e.g. cents, so that the
+    sums are exact; in that case, use the exact payment schedules of Loans,
+    as output by ``Loan.payments(exact=True)``, and take integer payment
+    schedule columns to be in minor units already.
+
     Return resulting DataFrame with the columns
 
     - ``"payment_date"``
@@ -163,25 +739,69 @@ def aggregate_payment_schedules(
     - ``"fee_payment_cumsum"``: cumulative sum of fee_payment
 
     """
-    if not payment_schedules:
+    if exact and decimals is None:
+        raise ValueError("Exact sums require an integer decimals")
+
+    amount_cols = ["principal_payment", "interest_payment", "fee_payment"]
+    cols = ["payment_date"] + amount_cols
+    scale = 10**decimals if decimals is not None else None
+
+    def group(chunk):
+        g = pd.concat(chunk).filter(cols)
+        if start_date is not None:
+            g = g.loc[lambda x: x["payment_date"] >= start_date]
+        if end_date is not None:
+            g = g.loc[lambda x: x["payment_date"] <= end_date]
+        return g.groupby(pd.Grouper(key="payment_date", freq=freq)).sum()
+
+    def fold(g, chunk):
+        h = group(chunk)
+        return h if g is None else pd.concat([g, h]).groupby(level=0).sum()
+
+    g = None
+    chunk = []
+    num_rows = 0
+    num_schedules = 0
+    for f in payment_schedules:
+        if hasattr(f, "payments"):
+            if exact:
+                f = f.payments(decimals, exact=True)
+            elif decimals is not None:
+                f = f.payments(decimals=None)
+            else:
+                f = f.payments()
+            f = f["payment_schedule"]
+        f = f.filter(cols)
+        if exact:
+            # Convert each schedule to minor units before concatenating, so
+            # that integer schedules are not cast to floats and rescaled
+            f = f.assign(
+                **{
+                    col: np.rint(f[col].to_numpy() * scale).astype(np.int64)
+                    for col in amount_cols
+                    if f[col].dtype.kind == "f"
+                }
+            )
+        chunk.append(f)
+        num_rows += f.shape[0]
+        num_schedules += 1
+        if num_rows >= chunk_size:
+            g = fold(g, chunk)
+            chunk = []
+            num_rows = 0
+
+    if not num_schedules:
         raise ValueError("No payment schedules given to aggregate")
 
-    g = pd.concat(payment_schedules).filter(
-        ["payment_date", "principal_payment", "interest_payment", "fee_payment"]
-    )
-    if start_date is not None:
-        g = g.loc[lambda x: x["payment_date"] >= start_date]
-    if end_date is not None:
-        g = g.loc[lambda x: x["payment_date"] <= end_date]
-    g = (
-        g.groupby(pd.Grouper(key="payment_date", freq=freq))
-        .sum()
-        .sort_index()
-        .reset_index()
-    )
+    if chunk:
+        g = fold(g, chunk)
+
+    # Regroup the running sums, which fills in periods missing from all chunks
+    g = g.groupby(pd.Grouper(freq=freq)).sum() if freq is not None else g
+    g = g.sort_index().reset_index()
 
     # Append total payment column
-    return (
+    g = (
         g.assign(
             total_payment=lambda x: (
                 x.principal_payment + x.interest_payment + x.fee_payment
@@ -192,3 +812,12 @@ def aggregate_payment_schedules(
         .assign(fee_payment_cumsum=lambda x: x.fee_payment.cumsum())
         .assign(total_payment_cumsum=lambda x: x.total_payment.cumsum())
     )
+
+    # Convert back from minor units or round
+    amount_cols = g.columns.drop("payment_date")
+    if exact:
+        g[amount_cols] = g[amount_cols] / scale
+    elif decimals is not None:
+        g[amount_cols] = g[amount_cols].round(decimals)
+
+    return g
@@ -6,7 +6,7 @@ import numbers
 import json
 import datetime as dt
 from typing import Union, Literal
-from dataclasses import dataclass, field
+from dataclasses import MISSING, dataclass, field, fields
 
 import pandas as pd
 import numpy as np
@@ -14,6 +14,48 @@ import voluptuous as vt
 
 from . import constants as cs
 from . import helpers as hp
+from .schedule import Schedule
+
+
+def _check_pos(value):
+    if isinstance(value, numbers.Number) and value > 0:
+        return value
+    raise vt.Invalid("Not a positive number")
+
+
+def _check_nneg(value):
+    if isinstance(value, numbers.Number) and value >= 0:
+        return value
+    raise vt.Invalid("Not a nonnegative number")
+
+
+def _check_pos_int(value):
+    if isinstance(value, int) and value > 0:
+        return value
+    raise vt.Invalid("Not a positive integer")
+
+
+def _check_freq(value):
+    if value in cs.NUM_BY_FREQ:
+        return value
+    raise vt.Invalid(f"Frequncy must be one of {cs.NUM_BY_FREQ.keys()}")
+
+
+# Schema of Loan init attributes, built once, since building is slow
+_LOAN_SCHEMA = vt.Schema(
+    {
+        "code": str,
+        "principal": _check_pos,
+        "interest_rate": _check_nneg,
+        "payment_freq": _check_freq,
+        "compounding_freq": _check_freq,
+        "num_payments": _check_pos_int,
+        "num_payments_interest_only": _check_nneg,
+        "first_payment_date": dt.date,
+        "fee": _check_nneg,
+    },
+    required=True,
+)
 
 
 @dataclass
@@ -64,43 +106,7 @@ class Loan:
         Return the input if it is valid.
         Otherwise, raise a Voluptuous Invalid error.
         """
-
-        def check_pos(value):
-            if isinstance(value, numbers.Number) and value > 0:
-                return value
-            raise vt.Invalid("Not a positive number")
-
-        def check_nneg(value):
-            if isinstance(value, numbers.Number) and value >= 0:
-                return value
-            raise vt.Invalid("Not a nonnegative number")
-
-        def check_pos_int(value):
-            if isinstance(value, int) and value > 0:
-                return value
-            raise vt.Invalid("Not a positive integer")
-
-        def check_freq(value):
-            if value in cs.NUM_BY_FREQ:
-                return value
-            raise vt.Invalid(f"Frequncy must be one of {cs.NUM_BY_FREQ.keys()}")
-
-        schema = vt.Schema(
-            {
-                "code": str,
-                "principal": check_pos,
-                "interest_rate": check_nneg,
-                "payment_freq": check_freq,
-                "compounding_freq": check_freq,
-                "num_payments": check_pos_int,
-                "num_payments_interest_only": check_nneg,
-                "first_payment_date": dt.date,
-                "fee": check_nneg,
-            },
-            required=True,
-        )
-
-        params = schema(params)
+        params = _LOAN_SCHEMA(params)
 
         # Extra checks
         if params["num_payments_interest_only"] > params["num_payments"]:
@@ -135,11 +141,39 @@ class Loan:
         Loan.validate(self.__dict__)
         self.set_kind()
 
+    @classmethod
+    def from_validated(cls, **attrs) -> "Loan":
+        """
+        Build and return a Loan from the given true field values, which
+        must already be valid, e.g. because they come from another Loan
+        or from :func:`loan_book.validate_loans`.
+        Skip validation, the slowest part of Loan construction,
+        and the rest of ``__post_init__``, but set the ``kind`` attribute.
+        Raise a ``TypeError`` if a required true field is missing.
+        """
+        loan = cls.__new__(cls)
+        for f in fields(cls):
+            if not f.init:
+                continue
+            if f.name in attrs:
+                value = attrs[f.name]
+            elif f.default is not MISSING:
+                value = f.default
+            elif f.default_factory is not MISSING:
+                value = f.default_factory()
+            else:
+                raise TypeError(f"Missing required Loan field {f.name!r}")
+            setattr(loan, f.name, value)
+        loan.set_kind()
+        return loan
+
     def copy(self) -> "Loan":
         """
         Return a copy of this Loan.
         """
-        return Loan(self.__dict__)
+        return type(self).from_validated(
+            **{k: getattr(self, k) for k in self.true_fields()}
+        )
 
     def interest_only_part(self) -> Union[None, "Loan"]:
         """
@@ -154,7 +188,7 @@ class Loan:
         # Correct some attributes
         attrs["num_payments"] = self.num_payments_interest_only
 
-        return Loan(**attrs)
+        return Loan.from_validated(**attrs)
 
     def amortized_part(self) -> Union[None, "Loan"]:
         """
@@ -171,15 +205,125 @@ class Loan:
             attrs["fee"] = 0
         attrs["num_payments"] = self.num_payments - self.num_payments_interest_only
         attrs["num_payments_interest_only"] = 0
-        date_offset = hp.to_date_offset(hp.freq_to_num(self.payment_freq))
-        attrs["first_payment_date"] = (
-            pd.Timestamp(self.first_payment_date)
-            + self.num_payments_interest_only * date_offset
-        ).date()
+        attrs["first_payment_date"] = hp.shift_dates(
+            self.first_payment_date,
+            hp.freq_to_num(self.payment_freq),
+            self.num_payments_interest_only,
+        ).item()
+
+        return Loan.from_validated(**attrs)
+
+    def _build_columns(
+        self,
+        start: int,
+        balance: float,
+        interest_rate: float,
+        num_payments: int,
+        extra_principal: float = 0.0,
+    ) -> tuple[dict, float, Union[float, None]]:
+        """
+        Build the unrounded payment schedule columns, except ``"notes"``,
+        of the payments ``start + 1, ..., num_payments`` of this Loan,
+        given the balance after payment ``start`` and the interest rate
+        from then on.
+        Add the given extra principal payment to payment ``start + 1``,
+        whose interest still accrues on the full balance, and amortize only
+        the reduced balance after it over the later payments.
+        Return the columns, the periodic payment of the remaining
+        interest only segment, and that of the remaining amortized segment,
+        if any, else ``None``.
+        Raise a ``ValueError`` if the extra principal payment is negative or
+        exceeds the balance after the regular principal payment ``start + 1``.
+
+        The payment dates are those of :meth:`payments`, that is,
+        an interest only segment of ``num_payments_interest_only`` payments
+        followed by an amortized segment of the remaining payments starting
+        that many periods after the first payment date.
+        An interest only Loan stays interest only, whatever the number of
+        payments.
+        """
+        k = hp.freq_to_num(self.payment_freq)
+        n = num_payments
+        m = n if self.kind == "interest_only" else self.num_payments_interest_only
+        P = balance
+        m_io = max(m - start, 0)
+        n_a = n - max(start, m)
+
+        # Build the interest only segment of m_io payments followed by the
+        # amortized segment of n_a payments, in one pass
+        A_io = P * interest_rate / k
+        if n_a > 0:
+            A = hp.amortize(
+                P, interest_rate, self.compounding_freq, self.payment_freq, n_a
+            )
+            # Balances before each amortized payment plus the final zero balance
+            b = hp.compute_principal_balances(
+                P, interest_rate, self.compounding_freq, self.payment_freq, n_a
+            )
+            principal_payment_a = np.append(b[:-2] - b[1:-1], b[-2])
+            interest_payment_a = A - principal_payment_a
+        else:
+            A = None
+            b = np.array([P], dtype=float)
+            principal_payment_a = interest_payment_a = np.array([], dtype=float)
+
+        beginning_balance = np.concatenate([np.full(m_io, P, dtype=float), b[:-1]])
+        principal_payment = np.concatenate([np.zeros(m_io), principal_payment_a])
+        if n_a == 0:
+            principal_payment[-1] = P
+        interest_payment = np.concatenate(
+            [np.full(m_io, A_io, dtype=float), interest_payment_a]
+        )
+        fee_payment = np.zeros(n - start)
+        if start == 0:
+            fee_payment[0] = self.fee
+
+        # The amortized segment starts m periods after the first payment date
+        start_date = hp.shift_dates(self.first_payment_date, k, m)
+        payment_date = np.concatenate(
+            [
+                hp.build_payment_dates(self.first_payment_date, k, m)[start:],
+                hp.build_payment_dates(start_date, k, n - m)[max(start, m) - m :],
+            ]
+        )
+
+        columns = {
+            "payment_sequence": np.arange(start + 1, n + 1),
+            "payment_date": payment_date.astype("datetime64[ns]"),
+            "beginning_balance": beginning_balance,
+            "principal_payment": principal_payment,
+            "ending_balance": beginning_balance - principal_payment,
+            "interest_payment": interest_payment,
+            "fee_payment": fee_payment,
+            "total_payment": fee_payment + principal_payment + interest_payment,
+        }
+
+        if extra_principal:
+            # Pay the extra principal along with the first payment and
+            # amortize the reduced balance over the remaining payments
+            x = extra_principal
+            balance_1 = columns["ending_balance"][0]
+            if not 0 <= x <= balance_1:
+                raise ValueError("Extra principal payment must lie in [0, balance]")
+            rest, A_io, A = self._build_columns(
+                start + 1, balance_1 - x, interest_rate, n
+            )
+            for name in ["principal_payment", "total_payment"]:
+                columns[name][0] += x
+            columns["ending_balance"][0] -= x
+            columns = {
+                name: np.concatenate([a[:1], rest[name]]) for name, a in columns.items()
+            }
 
-        return Loan(**attrs)
+        return columns, A_io, A
 
-    def payments(self, decimals: int = 2) -> dict:
+    def payments(
+        self,
+        decimals: int = 2,
+        output: Literal["frame", "array"] = "frame",
+        *,
+        exact: bool = False,
+    ) -> dict:
         """
         Create a payment schedule etc. for this Loan.
         Return a dictionary with the following keys and values.
@@ -216,169 +360,293 @@ class Loan:
         - ``"total_payment"``: float; fee_payemnt + principal_payment + interest_payment
         - ``"notes"``: NaN
 
+        If ``output == "array"``, then return the payment schedule as a
+        much more compact :class:`Schedule` instead, without the ``"notes"``
+        column.
+
+        If ``exact``, then compute all money values, including those of the
+        payment schedule, as int64 integers in minor units of the given number
+        of decimal places, e.g. cents if ``decimals == 2``, via
+        :func:`helpers.to_minor_units`.
+        Then the principal payments sum exactly to the principal, and the
+        final payment absorbs the rounding residual.
         """
+        if exact and decimals is None:
+            raise ValueError("Exact payments require an integer decimals")
+
+        P = self.principal
+        n = self.num_payments
+        m = self.num_payments_interest_only
+        columns, A_io, A = self._build_columns(0, P, self.interest_rate, n)
+        interest_payment = columns["interest_payment"]
+        payment_date = columns["payment_date"].astype("datetime64[D]")
+
+        fee = self.fee
+        if exact:
+            columns |= hp.to_minor_units(
+                [0, n],
+                columns["beginning_balance"],
+                columns["principal_payment"],
+                columns["interest_payment"],
+                columns["fee_payment"],
+                decimals,
+            )
+            scale = 10**decimals
+            P = int(columns["beginning_balance"][0])
+            fee = int(columns["fee_payment"][0])
+            interest_payment = columns["interest_payment"]
+            A_io = int(np.rint(A_io * scale))
+            A = int(np.rint(A * scale)) if A is not None else None
+
+        # Bundle result into dictionary
+        d = {}
+        dates = payment_date.tolist()
         if self.kind == "interest_only":
-            k = hp.freq_to_num(self.payment_freq)
-            A = self.principal * self.interest_rate / k
-            n = self.num_payments
-            f = (
-                pd.DataFrame({"payment_sequence": range(1, n + 1)})
-                .assign(beginning_balance=self.principal)
-                .assign(principal_payment=0)
-                .assign(ending_balance=self.principal)
-                .assign(interest_payment=A)
-                .assign(fee_payment=0)
+            d["periodic_payment"] = A_io
+        elif self.kind == "amortized":
+            d["periodic_payment"] = A
+        else:
+            d["periodic_payment"] = {"interest_only": A_io, "amortized": A}
+        d["interest_total"] = interest_payment.sum().item()
+        d["interest_and_fee_total"] = d["interest_total"] + fee
+        d["payment_total"] = d["interest_and_fee_total"] + P
+        d["interest_and_fee_total_over_principal"] = d["interest_and_fee_total"] / P
+        if self.kind == "combination":
+            d["first_payment_date"] = {
+                "interest_only": dates[0],
+                "amortized": dates[m],
+            }
+            d["last_payment_date"] = {
+                "interest_only": dates[m - 1],
+                "amortized": dates[-1],
+            }
+        else:
+            d["first_payment_date"] = dates[0]
+            d["last_payment_date"] = dates[-1]
+
+        # Round the float columns in place, and only then wrap them,
+        # without copying, in the output schedule
+        if decimals is not None:
+            for a in columns.values():
+                if a.dtype.kind == "f":
+                    np.round(a, decimals, out=a)
+        if output == "array":
+            d["payment_schedule"] = Schedule(**columns)
+        else:
+            d["payment_schedule"] = pd.DataFrame(
+                columns | {"notes": np.nan}, copy=False
             )
-            f.principal_payment.iat[-1] = self.principal
-            f.ending_balance.iat[-1] = 0
-            f.fee_payment.iat[0] = self.fee
-            f["total_payment"] = (
-                f.fee_payment + f.principal_payment + f.interest_payment
+
+        return _round_items(d, decimals)
+
+    def reschedule(
+        self,
+        payment_schedule: Union[pd.DataFrame, Schedule],
+        period: int,
+        *,
+        interest_rate: Union[float, None] = None,
+        extra_principal: float = 0.0,
+        num_payments: Union[int, None] = None,
+        decimals: int = 2,
+    ) -> Union[pd.DataFrame, Schedule]:
+        """
+        Given a payment schedule of this Loan, as output by :meth:`payments`
+        or by this method, and a period ``t``, that is, a number of payments
+        made, apply the following events at ``t``:
+
+        - ``interest_rate``: new annual interest rate; defaults to the
+          interest rate of payment ``t + 1`` in the given payment schedule,
+          that is, the last rate set at or before ``t`` by this method,
+          if any, else the interest rate of this Loan
+        - ``extra_principal``: extra principal payment made along with payment
+          ``t + 1``, which reduces the balance on which later payments
+          accrue interest
+        - ``num_payments``: new total number of payments; defaults to the
+          length of the payment schedule; an interest only Loan stays
+          interest only
+
+        Reuse the first ``t`` rows of the payment schedule and recompute only
+        the payments from ``t + 1`` on, starting from the ending balance of
+        payment ``t``, via :func:`helpers.amortize` and
+        :func:`helpers.compute_principal_balances`.
+        Return the resulting payment schedule, of the same type as the given
+        one, with float columns rounded to the given number of decimal places,
+        unless ``decimals is None``, or in integer minor units if the
+        given schedule is, as output by ``payments(exact=True)``.
+        Record the interest rates of the result as a tuple of pairs
+        (period, rate) in its ``attrs["interest_rates"]``, if it is a
+        DataFrame, or in its ``interest_rates`` attribute, if it is a
+        :class:`Schedule`, so that events can be chained.
+
+        Raise a ``ValueError`` if no payments would remain after ``t``,
+        if the interest only payments would not end before the last payment,
+        or if the extra principal payment is negative or exceeds the balance
+        after the regular principal payment ``t + 1``.
+        """
+        f = payment_schedule
+        t = period
+        n = len(f) if num_payments is None else num_payments
+        exact = np.asarray(f["principal_payment"]).dtype.kind in "iu"
+        if exact and decimals is None:
+            raise ValueError("Exact payments require an integer decimals")
+        if not 0 <= t <= len(f) or t >= n:
+            raise ValueError("Period must be less than the number of payments")
+        if (
+            self.kind != "interest_only"
+            and max(t, self.num_payments_interest_only) >= n
+        ):
+            raise ValueError("Interest only payments must end before the last payment")
+
+        # Balance after payment t
+        if t == 0:
+            balance = self.principal
+        else:
+            balance = np.asarray(f["ending_balance"])[t - 1].item()
+            if exact:
+                balance /= 10**decimals
+
+        # Interest rates of the given schedule before t, followed by the new one
+        if isinstance(f, Schedule):
+            rates = f.interest_rates
+        else:
+            rates = f.attrs.get("interest_rates")
+        if rates is None:
+            rates = ((0, self.interest_rate),)
+        if interest_rate is None:
+            i = [r for p, r in rates if p <= t][-1]
+        else:
+            i = interest_rate
+        rates = tuple((p, r) for p, r in rates if p < t) + ((t, i),)
+
+        columns, __, __ = self._build_columns(t, balance, i, n, extra_principal)
+        if exact:
+            columns |= hp.to_minor_units(
+                [0, n - t],
+                columns["beginning_balance"],
+                columns["principal_payment"],
+                columns["interest_payment"],
+                columns["fee_payment"],
+                decimals,
             )
-            f["notes"] = np.nan
-
-            date_offset = hp.to_date_offset(k)
-            if date_offset:
-                # Kludge for pd.date_range not working easily here;
-                # see https://github.com/pandas-dev/pandas/issues/2289
-                f["payment_date"] = [
-                    pd.Timestamp(self.first_payment_date) + j * date_offset
-                    for j in range(n)
-                ]
-                # Put payment date first
-                cols = f.columns.tolist()
-                cols.remove("payment_date")
-                cols.insert(1, "payment_date")
-                f = f[cols].copy()
-
-            # Bundle result into dictionary
-            d = {}
-            d["payment_schedule"] = f
-            d["periodic_payment"] = A
-            d["interest_total"] = f["interest_payment"].sum()
-            d["interest_and_fee_total"] = d["interest_total"] + self.fee
-            d["payment_total"] = d["interest_and_fee_total"] + self.principal
-            d["interest_and_fee_total_over_principal"] = (
-                d["interest_and_fee_total"] / self.principal
+        elif decimals is not None:
+            for a in columns.values():
+                if a.dtype.kind == "f":
+                    np.round(a, decimals, out=a)
+
+        # Append the new payments to the reused ones
+        if isinstance(f, Schedule):
+            return Schedule(
+                interest_rates=rates,
+                **{
+                    name: np.concatenate([f[name][:t], a])
+                    for name, a in columns.items()
+                },
             )
-            if "payment_date" in f:
-                d["first_payment_date"] = f.payment_date.iat[0].date()
-                d["last_payment_date"] = f.payment_date.iat[-1].date()
+        else:
+            g = pd.DataFrame(columns | {"notes": np.nan}, copy=False)
+            g = pd.concat([f.iloc[:t], g], ignore_index=True)
+            g.attrs["interest_rates"] = rates
+            return g
+
+    def apr(self, *, effective: bool = False) -> float:
+        """
+        Return the annual percentage rate (APR) of this Loan, as a decimal,
+        that is, the internal rate of return per payment period of its
+        unrounded payments, including the fee paid with the first payment,
+        times the number of payments per year.
+        If ``effective``, then return the effective annual rate instead.
+        See :func:`helpers.compute_aprs`.
+        """
+        columns, __, __ = self._build_columns(
+            0, self.principal, self.interest_rate, self.num_payments
+        )
+        return hp.compute_aprs(
+            self.principal,
+            columns["total_payment"],
+            self.payment_freq,
+            effective=effective,
+        )[0].item()
+
+    def summary(self, decimals: int = 2) -> dict:
+        """
+        Return a dictionary with the same keys and values as :meth:`payments`,
+        except for the payment schedule.
+        Compute these in closed form via :func:`helpers.amortize` and the
+        interest only payment formula, without building any DataFrames,
+        which is much faster.
+        Interest totals can differ from those of :meth:`payments` in the
+        last few floating point digits, because they are not sums of
+        payment schedule columns.
+
+        Round all values to the given number of decimal places, but do not
+        round if ``decimals is None``.
+        """
+        P = self.principal
+        k = hp.freq_to_num(self.payment_freq)
+        n = self.num_payments
+        m = self.num_payments_interest_only
+        first_date = self.first_payment_date
+
+        d = {}
+        if self.kind == "interest_only":
+            A = P * self.interest_rate / k
+            d["periodic_payment"] = A
+            d["interest_total"] = n * A
+            d["first_payment_date"] = first_date
+            d["last_payment_date"] = hp.shift_dates(first_date, k, n - 1).item()
 
         elif self.kind == "amortized":
             A = hp.amortize(
-                self.principal,
-                self.interest_rate,
-                self.compounding_freq,
-                self.payment_freq,
-                self.num_payments,
-            )
-            p = hp.build_principal_fn(
-                self.principal,
-                self.interest_rate,
-                self.compounding_freq,
-                self.payment_freq,
-                self.num_payments,
+                P, self.interest_rate, self.compounding_freq, self.payment_freq, n
             )
-            n = self.num_payments
-            f = (
-                pd.DataFrame({"payment_sequence": range(1, n + 1)})
-                .assign(beginning_balance=lambda x: (x.payment_sequence - 1).map(p))
-                .assign(
-                    principal_payment=lambda x: x.beginning_balance.diff(-1).fillna(
-                        x.beginning_balance.iat[-1]
-                    )
-                )
-                .assign(
-                    ending_balance=lambda x: x.beginning_balance - x.principal_payment
-                )
-                .assign(interest_payment=lambda x: A - x.principal_payment)
-                .assign(fee_payment=0)
-            )
-            f.fee_payment.iat[0] = self.fee
-            f["total_payment"] = (
-                f.fee_payment + f.principal_payment + f.interest_payment
-            )
-            f["notes"] = np.nan
-
-            date_offset = hp.to_date_offset(hp.freq_to_num(self.payment_freq))
-            if date_offset:
-                # Kludge for pd.date_range not working easily here;
-                # see https://github.com/pandas-dev/pandas/issues/2289
-                f["payment_date"] = [
-                    pd.Timestamp(self.first_payment_date) + j * date_offset
-                    for j in range(n)
-                ]
-                # Put payment date first
-                cols = f.columns.tolist()
-                cols.remove("payment_date")
-                cols.insert(1, "payment_date")
-                f = f[cols].copy()
-
-            # Bundle result into dictionary
-            d = {}
-            d["payment_schedule"] = f
             d["periodic_payment"] = A
-            d["interest_total"] = f["interest_payment"].sum()
-            d["interest_and_fee_total"] = d["interest_total"] + self.fee
-            d["payment_total"] = d["interest_and_fee_total"] + self.principal
-            d["interest_and_fee_total_over_principal"] = (
-                d["interest_and_fee_total"] / self.principal
-            )
-            d["first_payment_date"] = f.payment_date.iat[0].date()
-            d["last_payment_date"] = f.payment_date.iat[-1].date()
+            d["interest_total"] = n * A - P
+            d["first_payment_date"] = first_date
+            d["last_payment_date"] = hp.shift_dates(first_date, k, n - 1).item()
 
         else:
             # Combination loan
-            iops = self.interest_only_part().payments(decimals=None)
-            aps = self.amortized_part().payments(decimals=None)
-
-            # Combine payment schedules
-            f_io = iops["payment_schedule"].copy()
-            f_io["principal_payment"].iat[-1] = 0
-            f_io["ending_balance"].iat[-1] = self.principal
-            f_io["total_payment"].iat[-1] -= self.principal
-            f_a = aps["payment_schedule"]
-            f = (
-                pd.concat([f_io, f_a])
-                .reset_index(drop=True)
-                .assign(payment_sequence=lambda x: x.index + 1)
-            )
-
-            # Combine other items
-            d = {}
-            d["payment_schedule"] = f
-            d["periodic_payment"] = {
-                "interest_only": iops["periodic_payment"],
-                "amortized": aps["periodic_payment"],
-            }
-            d["interest_total"] = f["interest_payment"].sum()
-            d["interest_and_fee_total"] = d["interest_total"] + self.fee
-            d["payment_total"] = d["interest_and_fee_total"] + self.principal
-            d["interest_and_fee_total_over_principal"] = (
-                d["interest_and_fee_total"] / self.principal
+            A_io = P * self.interest_rate / k
+            A = hp.amortize(
+                P, self.interest_rate, self.compounding_freq, self.payment_freq, n - m
             )
+            start_date = hp.shift_dates(first_date, k, m).item()
+            d["periodic_payment"] = {"interest_only": A_io, "amortized": A}
+            d["interest_total"] = m * A_io + (n - m) * A - P
             d["first_payment_date"] = {
-                "interest_only": iops["first_payment_date"],
-                "amortized": aps["first_payment_date"],
+                "interest_only": first_date,
+                "amortized": start_date,
             }
             d["last_payment_date"] = {
-                "interest_only": iops["last_payment_date"],
-                "amortized": aps["last_payment_date"],
+                "interest_only": hp.shift_dates(first_date, k, m - 1).item(),
+                "amortized": hp.shift_dates(start_date, k, n - m - 1).item(),
             }
-        if decimals is not None:
-            for key, val in d.items():
-                if isinstance(val, pd.DataFrame):
-                    d[key] = val.round(decimals)
-                elif isinstance(val, dict):
-                    try:
-                        d[key] = {k: round(v, decimals) for k, v in val.items()}
-                    except TypeError:
-                        continue
-                elif isinstance(val, float):
-                    d[key] = round(val, decimals)
-
-        return d
+
+        d["interest_and_fee_total"] = d["interest_total"] + self.fee
+        d["payment_total"] = d["interest_and_fee_total"] + P
+        d["interest_and_fee_total_over_principal"] = d["interest_and_fee_total"] / P
+
+        return _round_items(d, decimals)
+
+
+def _round_items(d: dict, decimals: Union[int, None]) -> dict:
+    """
+    Round the floats and dictionaries of floats that are values of the given
+    dictionary to the given number of decimal places,
+    but do not round if ``decimals is None``.
+    Return the resulting dictionary.
+    """
+    if decimals is not None:
+        for key, val in d.items():
+            if isinstance(val, dict):
+                try:
+                    d[key] = {k: round(v, decimals) for k, v in val.items()}
+                except TypeError:
+                    continue
+            elif isinstance(val, float):
+                d[key] = round(val, decimals)
+
+    return d
 
 
 def read_loan(path: pl.PosixPath) -> "Loan":
@@ -0,0 +1,800 @@
+"""
+Module defining the LoanBook class, a columnar collection of loans whose
+payment schedules are computed in bulk with NumPy.
+"""
+import json
+import datetime as dt
+import glob
+import pathlib as pl
+from dataclasses import dataclass, fields
+from typing import Iterable, Iterator, Literal, Optional, Union
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from . import constants as cs
+from . import helpers as hp
+from .loan import Loan
+
+
+#: Payment schedule columns in the order output by :meth:`Loan.payments`
+SCHEDULE_COLUMNS = [
+    "payment_sequence",
+    "payment_date",
+    "beginning_balance",
+    "principal_payment",
+    "ending_balance",
+    "interest_payment",
+    "fee_payment",
+    "total_payment",
+    "notes",
+]
+
+
+@dataclass
+class LoanBook:
+    """
+    A columnar collection of loans, each attribute of which is a
+    NumPy array with one entry per loan.
+    Attributes are the true fields of :class:`Loan`, namely
+
+    - ``code``: array of loan codes
+    - ``principal``: array of loan principals
+    - ``interest_rate``: array of nominal annual interest rates
+    - ``payment_freq``: array of payment frequencies;
+      keys of :const:`NUM_BY_FREQ`
+    - ``compounding_freq``: array of compounding frequencies;
+      keys of :const:`NUM_BY_FREQ`
+    - ``num_payments``: array of numbers of payments
+    - ``num_payments_interest_only``: array of numbers of initial interest only
+      payments
+    - ``fee``: array of loan fees
+    - ``first_payment_date``: array of first payment dates;
+      coerced to NumPy ``datetime64[D]``
+
+    """
+
+    code: np.ndarray
+    principal: np.ndarray
+    interest_rate: np.ndarray
+    payment_freq: np.ndarray
+    compounding_freq: np.ndarray
+    num_payments: np.ndarray
+    num_payments_interest_only: np.ndarray
+    fee: np.ndarray
+    first_payment_date: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.code = np.asarray(self.code, dtype=object)
+        for key in ["principal", "interest_rate", "fee"]:
+            setattr(self, key, np.asarray(getattr(self, key), dtype=float))
+        for key in ["payment_freq", "compounding_freq"]:
+            setattr(self, key, np.asarray(getattr(self, key), dtype=str))
+        for key in ["num_payments", "num_payments_interest_only"]:
+            setattr(self, key, np.asarray(getattr(self, key), dtype=np.int64))
+        self.first_payment_date = np.asarray(
+            self.first_payment_date, dtype="datetime64[D]"
+        )
+
+        lengths = {getattr(self, f.name).shape for f in fields(self)}
+        if len(lengths) != 1 or len(next(iter(lengths))) != 1:
+            raise ValueError("LoanBook attributes must be 1-D arrays of equal length")
+
+    def __len__(self) -> int:
+        return self.code.shape[0]
+
+    @classmethod
+    def from_loans(cls, loans: Iterable[Loan]) -> "LoanBook":
+        """
+        Build a LoanBook from the given iterable of Loans.
+        """
+        loans = list(loans)
+        return cls(
+            **{f.name: [getattr(loan, f.name) for loan in loans] for f in fields(cls)}
+        )
+
+    @classmethod
+    def from_frame(cls, f: DataFrame) -> "LoanBook":
+        """
+        Build a LoanBook from a DataFrame with one row per loan and
+        a column for each LoanBook attribute.
+        Additional columns will be ignored.
+        """
+        return cls(**{c.name: f[c.name].to_numpy() for c in fields(cls)})
+
+    def to_frame(self) -> DataFrame:
+        """
+        Return a DataFrame with one row per loan and one column per
+        LoanBook attribute.
+        """
+        return pd.DataFrame({c.name: getattr(self, c.name) for c in fields(self)})
+
+    def to_loans(self, *, validate: bool = True) -> list[Loan]:
+        """
+        Return a list of Loans, one for each loan in this LoanBook.
+        Validate each Loan if ``validate``; otherwise build them
+        via :meth:`Loan.from_validated`, which is much faster, for instance
+        for LoanBooks from :func:`read_loans`.
+        """
+        build = Loan if validate else Loan.from_validated
+        return [
+            build(
+                **(
+                    row
+                    | {
+                        "first_payment_date": pd.Timestamp(
+                            row["first_payment_date"]
+                        ).date()
+                    }
+                )
+            )
+            for row in self.to_frame().to_dict(orient="records")
+        ]
+
+    def take(self, indices: np.ndarray) -> "LoanBook":
+        """
+        Return a new LoanBook of the loans at the given indices or slice.
+        """
+        return LoanBook(
+            **{c.name: getattr(self, c.name)[indices] for c in fields(self)}
+        )
+
+    def iter_chunks(self, chunk_size: int) -> Iterator["LoanBook"]:
+        """
+        Split this LoanBook into consecutive LoanBooks with about ``chunk_size``
+        payment schedule rows each, and yield them in order.
+        A chunk exceeds ``chunk_size`` rows by at most the rows of its last loan.
+        """
+        starts = np.concatenate([[0], np.cumsum(self.num_payments)[:-1]])
+        chunk_ids = starts // chunk_size
+        bounds = np.concatenate(
+            [[0], np.flatnonzero(np.diff(chunk_ids)) + 1, [len(self)]]
+        )
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            yield self.take(slice(start, stop))
+
+    def schedule_arrays(self) -> dict:
+        """
+        Compute the payment schedules of all the loans in this LoanBook
+        at once, without rounding.
+        Return a dictionary of ragged arrays, namely
+
+        - ``"offsets"``: integer array of length ``len(self) + 1`` such that
+          the rows of loan ``i`` occupy the slice
+          ``offsets[i]:offsets[i + 1]`` of each remaining array
+        - ``"loan_index"``: integer array; index of the loan of each row
+        - ``"interest_rate"``: float array of length ``len(self)``; annual
+          interest rate of each loan over the rows
+        - one array for each payment schedule column of :meth:`Loan.payments`,
+          except ``"notes"``
+
+        Each loan is treated as an interest only part of
+        ``num_payments_interest_only`` payments followed by an amortized part of
+        the remaining payments, which yields the same schedules as
+        :meth:`Loan.payments` for all three kinds of loans.
+        """
+        zeros = np.zeros(len(self), dtype=np.int64)
+        return self._build_arrays(
+            zeros, self.principal, self.interest_rate, self.num_payments, 0.0
+        )
+
+    def reschedule(
+        self,
+        period: Union[int, np.ndarray],
+        *,
+        interest_rate: Optional[np.ndarray] = None,
+        extra_principal: Union[float, np.ndarray] = 0.0,
+        num_payments: Optional[np.ndarray] = None,
+        schedule: Optional[dict] = None,
+    ) -> dict:
+        """
+        Given a period ``t``, that is, a number of payments made, or an array
+        of them, one per loan, apply the following events at ``t`` to the loans
+        of this LoanBook, each one a scalar or an array, one value per loan:
+
+        - ``interest_rate``: new annual interest rate; defaults to the
+          interest rates of the given schedule, if any, else of the loans
+        - ``extra_principal``: extra principal payment made along with payment
+          ``t + 1``, which reduces the balance on which later payments
+          accrue interest
+        - ``num_payments``: new total number of payments; defaults to the
+          numbers of payments of the given schedule, if any, else of the loans;
+          interest only loans stay interest only
+
+        and recompute only the payments ``t + 1, t + 2, ...`` in one vectorized
+        pass, like :meth:`Loan.reschedule`.
+        If a schedule, as output by :meth:`schedule_arrays` or by this method,
+        is given, then take the balances after payment ``t`` and the interest
+        rates from it, so that events can be chained; otherwise compute them
+        in closed form from the loan attributes.
+        So the work scales with the numbers of remaining payments instead of
+        the full terms.
+        Return a dictionary of ragged arrays as in :meth:`schedule_arrays`,
+        but for the remaining payments only, with payment sequence numbers
+        continuing those of the first ``t`` payments.
+
+        Raise a ``ValueError`` if a loan would have no remaining payments,
+        if its interest only payments would not end before its last payment,
+        if an extra principal payment is negative or exceeds its balance after
+        the regular principal payment ``t + 1``, or if a period lies outside the payments of the given schedule.
+        """
+        L = len(self)
+        t = np.broadcast_to(np.asarray(period, dtype=np.int64), (L,))
+        x = np.broadcast_to(np.asarray(extra_principal, dtype=float), (L,))
+
+        if schedule is not None:
+            i = schedule["interest_rate"] if interest_rate is None else interest_rate
+            i = np.broadcast_to(np.asarray(i, dtype=float), (L,))
+            # Balances after t payments in the given schedule, namely the
+            # beginning balances of payments t + 1, before any extra principal
+            # payments made then
+            offsets = schedule["offsets"]
+            seq = schedule["payment_sequence"]
+            first = seq[offsets[:-1]] - 1
+            last = seq[offsets[1:] - 1]
+            if np.any((t < first) | (t >= last)):
+                raise ValueError("Periods must lie within the given schedule")
+            n = last if num_payments is None else num_payments
+            n = np.broadcast_to(np.asarray(n, dtype=np.int64), (L,))
+            balance = schedule["beginning_balance"][offsets[:-1] + t - first]
+            return self._reschedule(t, balance, i, n, x)
+
+        i = self.interest_rate if interest_rate is None else interest_rate
+        i = np.broadcast_to(np.asarray(i, dtype=float), (L,))
+        n = self.num_payments if num_payments is None else num_payments
+        n = np.broadcast_to(np.asarray(n, dtype=np.int64), (L,))
+
+        # Balances after t payments under the current loan attributes
+        P = self.principal
+        m = self.num_payments_interest_only
+        na = self.num_payments - m
+        k = hp._freqs_to_nums(self.payment_freq)
+        j = hp._freqs_to_nums(self.compounding_freq, allow_cts=True)
+        I = hp._period_interest_rates(self.interest_rate, j, k)
+        balance = hp._principal_balances(P, I, na, np.clip(t - m, 0, na))
+
+        return self._reschedule(t, balance, i, n, x)
+
+    def _reschedule(
+        self,
+        t: np.ndarray,
+        balance: np.ndarray,
+        interest_rate: np.ndarray,
+        num_payments: np.ndarray,
+        extra_principal: np.ndarray,
+    ) -> dict:
+        """
+        Check the events of :meth:`reschedule` at the given periods and
+        balances after them, and build the arrays of the remaining payments.
+        """
+        n, x = num_payments, extra_principal
+        m = self.num_payments_interest_only
+        is_io = m == self.num_payments
+        if np.any((t < 0) | (t >= n)):
+            raise ValueError("Periods must be less than the numbers of payments")
+        if np.any(~is_io & (np.maximum(t, m) >= n)):
+            raise ValueError("Interest only payments must end before the last payment")
+
+        return self._build_arrays(t, balance, interest_rate, n, x)
+
+    def _build_arrays(
+        self,
+        start: np.ndarray,
+        balance: np.ndarray,
+        interest_rate: np.ndarray,
+        num_payments: np.ndarray,
+        extra_principal: Union[float, np.ndarray],
+    ) -> dict:
+        """
+        Build the unrounded payment schedule arrays of the payments
+        ``start + 1, ..., num_payments`` of the loans of this LoanBook,
+        given the balances after payment ``start``, the interest rates from
+        then on, and extra principal payments made along with payment
+        ``start + 1``, all arrays of one value per loan.
+        Vectorized version of ``Loan._build_columns``.
+        Raise a ``ValueError`` if an extra principal payment is negative or
+        exceeds the balance after the regular principal payment ``start + 1``.
+        """
+        n = num_payments
+        # Interest only loans stay interest only
+        m = np.where(
+            self.num_payments_interest_only == self.num_payments,
+            n,
+            self.num_payments_interest_only,
+        )
+        x = np.broadcast_to(np.asarray(extra_principal, dtype=float), start.shape)
+        P = balance
+        na = n - np.maximum(start, m)
+        k = hp._freqs_to_nums(self.payment_freq)
+        j = hp._freqs_to_nums(self.compounding_freq, allow_cts=True)
+        I = hp._period_interest_rates(interest_rate, j, k)
+
+        A = hp._amortized_payments(P, I, na)
+        A_io = P * interest_rate / k
+
+        # Lay out one row per remaining payment
+        r = n - start
+        offsets = np.concatenate([[0], np.cumsum(r)])
+        loan = np.repeat(np.arange(len(self)), r)
+        seq = np.arange(offsets[-1]) - offsets[:-1][loan] + start[loan]
+        m_ = m[loan]
+        is_io = seq < m_
+        t = seq - np.maximum(start, m)[loan]
+
+        # Amortized balances
+        P_, I_, na_ = P[loan], I[loan], na[loan]
+        b = hp._principal_balances(P_, I_, na_, t)
+        b_next = hp._principal_balances(P_, I_, na_, t + 1)
+        beginning_balance = np.where(is_io, P_, b)
+        principal_payment = np.where(
+            is_io,
+            np.where((na_ == 0) & (seq == n[loan] - 1), P_, 0.0),
+            np.where(t == na_ - 1, b, b - b_next),
+        )
+
+        interest_payment = np.where(is_io, A_io[loan], A[loan] - principal_payment)
+
+        ending_balance = beginning_balance - principal_payment
+        fee_payment = np.where(seq == 0, self.fee[loan], 0.0)
+        total_payment = fee_payment + principal_payment + interest_payment
+
+        # The amortized part starts num_payments_interest_only periods
+        # after the first payment date and steps from there
+        k_ = k[loan]
+        start_date = hp.shift_dates(self.first_payment_date, k, m)[loan]
+        payment_date = np.where(
+            is_io,
+            hp.shift_dates(self.first_payment_date[loan], k_, seq),
+            hp.shift_dates(start_date, k_, np.maximum(seq - m_, 0)),
+        )
+
+        a = {
+            "offsets": offsets,
+            "loan_index": loan,
+            "interest_rate": np.asarray(interest_rate, dtype=float),
+            "payment_sequence": seq + 1,
+            "payment_date": payment_date,
+            "beginning_balance": beginning_balance,
+            "principal_payment": principal_payment,
+            "ending_balance": ending_balance,
+            "interest_payment": interest_payment,
+            "fee_payment": fee_payment,
+            "total_payment": total_payment,
+        }
+
+        if np.any(x):
+            # Pay the extra principal along with the first payments and
+            # amortize the reduced balances over the remaining payments,
+            # whose rows follow the first rows in the same order
+            first = offsets[:-1][r > 0]
+            balance_1 = np.zeros_like(P)
+            balance_1[r > 0] = ending_balance[first]
+            if np.any((x < 0) | (x > balance_1)):
+                raise ValueError("Extra principal payments must lie in [0, balance]")
+            rest = self._build_arrays(start + 1, balance_1 - x, interest_rate, n, 0.0)
+            is_rest = seq != start[loan]
+            for name in SCHEDULE_COLUMNS:
+                if name not in ["notes", "payment_sequence", "payment_date"]:
+                    a[name][is_rest] = rest[name]
+            for name in ["principal_payment", "total_payment"]:
+                a[name][first] += x[r > 0]
+            a["ending_balance"][first] -= x[r > 0]
+
+        return a
+
+    def payments(self, decimals: int = 2, *, exact: bool = False) -> DataFrame:
+        """
+        Compute the payment schedules of all the loans in this LoanBook
+        in one vectorized pass, and return them as a single long-format
+        DataFrame with the column ``"code"`` followed by the payment schedule
+        columns of :meth:`Loan.payments`.
+
+        Round all values to the given number of decimal places, but do not
+        round if ``decimals is None``.
+
+        If ``exact``, then compute the money columns as int64 integers in
+        minor units of the given number of decimal places, as in
+        ``Loan.payments(exact=True)``, so that the principal payments of
+        each loan sum exactly to its principal.
+        """
+        if exact and decimals is None:
+            raise ValueError("Exact payments require an integer decimals")
+
+        a = self.schedule_arrays()
+        columns = {c: a[c] for c in SCHEDULE_COLUMNS if c != "notes"}
+        columns["payment_date"] = columns["payment_date"].astype("datetime64[ns]")
+        if exact:
+            columns |= hp.to_minor_units(
+                a["offsets"],
+                a["beginning_balance"],
+                a["principal_payment"],
+                a["interest_payment"],
+                a["fee_payment"],
+                decimals,
+            )
+
+        # Round the float columns in place before wrapping them without copying
+        if decimals is not None:
+            for v in columns.values():
+                if v.dtype.kind == "f":
+                    np.round(v, decimals, out=v)
+
+        return pd.DataFrame(
+            {"code": self.code[a["loan_index"]]} | columns | {"notes": np.nan},
+            copy=False,
+        )
+
+    def apr(self, *, effective: bool = False) -> np.ndarray:
+        """
+        Return the array of annual percentage rates (APRs) of the loans of
+        this LoanBook, computed all at once from their unrounded payment
+        schedules, including fees, as in :meth:`Loan.apr`.
+        """
+        a = self.schedule_arrays()
+        return hp.compute_aprs(
+            self.principal,
+            a["total_payment"],
+            self.payment_freq,
+            a["offsets"],
+            effective=effective,
+        )
+
+    def npv(
+        self,
+        curves: Iterable[Union[float, dict]],
+        valuation_date: dt.date,
+        compounding_freq: str = "annually",
+    ) -> np.ndarray:
+        """
+        Return the matrix of net present values at the given valuation date
+        of the remaining unrounded total payments, fees included, of the
+        loans of this LoanBook against the given discount curves,
+        of shape ``(len(self), len(curves))``.
+        See :func:`helpers.compute_npvs`.
+        """
+        a = self.schedule_arrays()
+        return hp.compute_npvs(
+            a["payment_date"],
+            a["total_payment"],
+            curves,
+            valuation_date,
+            a["offsets"],
+            compounding_freq,
+        )
+
+    def shock_rates(
+        self, shifts: Iterable[float], chunk_size: int = 10_000_000
+    ) -> dict:
+        """
+        Reprice the loans of this LoanBook under each of the given
+        interest rate shifts, each one added to the interest rates of all
+        the loans, in one broadcast pass per chunk of scenarios, reusing the
+        payment dates and the row layout of :meth:`schedule_arrays`
+        across scenarios.
+        Process the scenarios in chunks of about ``chunk_size`` payment
+        schedule rows to bound memory use.
+
+        Return a dictionary with the unrounded arrays
+
+        - ``"shift"``: the S given rate shifts
+        - ``"payment_date"``: the U distinct payment dates of the loans,
+          in increasing order
+        - ``"principal_payment"``, ``"interest_payment"``, ``"fee_payment"``,
+          ``"total_payment"``: arrays of shape (S, U) of the corresponding
+          payments of all the loans by scenario and payment date
+        - ``"interest_total"``, ``"payment_total"``: arrays of shape
+          ``(S, len(self))`` of the interest totals and payment totals,
+          including fees, of the loans by scenario
+
+        """
+        shifts = np.asarray(list(shifts), dtype=float)
+        S = shifts.shape[0]
+        L = len(self)
+        P = self.principal
+        a = self.schedule_arrays()
+        loan = a["loan_index"]
+        R = loan.shape[0]
+        dates, date_index = np.unique(a["payment_date"], return_inverse=True)
+        U = dates.shape[0]
+
+        # Per-loan and per-row invariants
+        n = self.num_payments
+        m = self.num_payments_interest_only
+        na = n - m
+        k = hp._freqs_to_nums(self.payment_freq)
+        j = hp._freqs_to_nums(self.compounding_freq, allow_cts=True)
+        seq = a["payment_sequence"] - 1
+        m_ = m[loan]
+        is_io = seq < m_
+        t = seq - m_
+        P_, na_ = P[loan], na[loan]
+        is_balloon = (na_ == 0) & (seq == n[loan] - 1)
+        fee_payment = a["fee_payment"]
+        fee_by_date = np.bincount(date_index, weights=fee_payment, minlength=U)
+        fee_by_loan = np.bincount(loan, weights=fee_payment, minlength=L)
+
+        d = {
+            "shift": shifts,
+            "payment_date": dates,
+            "principal_payment": np.empty((S, U)),
+            "interest_payment": np.empty((S, U)),
+            "fee_payment": np.broadcast_to(fee_by_date, (S, U)).copy(),
+            "total_payment": np.empty((S, U)),
+            "interest_total": np.empty((S, L)),
+            "payment_total": np.empty((S, L)),
+        }
+        step = max(1, chunk_size // max(R, 1))
+        for start in range(0, S, step):
+            s = slice(start, min(start + step, S))
+            c = shifts[s].shape[0]
+            i = self.interest_rate[None, :] + shifts[s, None]
+            I = hp._period_interest_rates(i, j, k)
+            A = hp._amortized_payments(P, I, na)
+            A_io = P * i / k
+
+            # Amortized balances
+            I_ = I[:, loan]
+            b = hp._principal_balances(P_, I_, na_, t)
+            b_next = hp._principal_balances(P_, I_, na_, t + 1)
+            principal_payment = np.where(
+                is_io,
+                np.where(is_balloon, P_, 0.0),
+                np.where(t == na_ - 1, b, b - b_next),
+            )
+            interest_payment = np.where(
+                is_io, A_io[:, loan], A[:, loan] - principal_payment
+            )
+
+            # Aggregate by scenario and date, and by scenario and loan
+            offset = np.arange(c)[:, None]
+            by_date = (offset * U + date_index).ravel()
+            by_loan = (offset * L + loan).ravel()
+            d["principal_payment"][s] = np.bincount(
+                by_date, weights=principal_payment.ravel(), minlength=c * U
+            ).reshape(c, U)
+            d["interest_payment"][s] = np.bincount(
+                by_date, weights=interest_payment.ravel(), minlength=c * U
+            ).reshape(c, U)
+            d["interest_total"][s] = np.bincount(
+                by_loan, weights=interest_payment.ravel(), minlength=c * L
+            ).reshape(c, L)
+
+        d["total_payment"] = (
+            d["principal_payment"] + d["interest_payment"] + d["fee_payment"]
+        )
+        d["payment_total"] = d["interest_total"] + fee_by_loan + P
+        return d
+
+    def to_parquet(
+        self,
+        path: pl.Path,
+        partition_by: Literal["code", "payment_month"] = "code",
+        chunk_size: int = 1_000_000,
+        decimals: Optional[int] = 2,
+        *,
+        as_decimal: bool = False,
+    ) -> None:
+        """
+        Write the payment schedules of this LoanBook, minus the ``"notes"``
+        column, to a Hive-partitioned Parquet dataset in the given directory,
+        partitioned by loan code or by payment month (a ``"YYYY-MM"`` string).
+        Compute and stream the schedules as Arrow record batches of about
+        ``chunk_size`` rows each (see :meth:`iter_chunks`), so that memory
+        use stays bounded.
+
+        Use compact column types, namely dictionary encoded codes, int32
+        payment sequences, date32 payment dates, and float64 amounts rounded to
+        the given number of decimal places (no rounding if ``decimals is None``),
+        or, if ``as_decimal``, decimal128 amounts with ``decimals`` places.
+
+        Requires the optional dependency PyArrow.
+        """
+        # Import here, since PyArrow is optional
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        if partition_by not in ["code", "payment_month"]:
+            raise ValueError("partition_by must be 'code' or 'payment_month'")
+        if as_decimal and decimals is None:
+            raise ValueError("Decimal amounts require an integer decimals")
+
+        amount_cols = [
+            "beginning_balance",
+            "principal_payment",
+            "ending_balance",
+            "interest_payment",
+            "fee_payment",
+            "total_payment",
+        ]
+        amount_type = pa.decimal128(18, decimals) if as_decimal else pa.float64()
+        schema = pa.schema(
+            [
+                ("code", pa.dictionary(pa.int32(), pa.string())),
+                ("payment_sequence", pa.int32()),
+                ("payment_date", pa.date32()),
+            ]
+            + [(c, amount_type) for c in amount_cols]
+            + (
+                [("payment_month", pa.string())]
+                if partition_by == "payment_month"
+                else []
+            )
+        )
+
+        def to_amounts(x):
+            if as_decimal:
+                # Round exactly in decimal arithmetic, not in binary floats
+                return pc.round(
+                    pa.array(x).cast(pa.decimal128(38, 12), safe=False), decimals
+                ).cast(amount_type)
+            elif decimals is not None:
+                return pa.array(np.round(x, decimals))
+            else:
+                return pa.array(x)
+
+        def iter_batches():
+            for book in self.iter_chunks(chunk_size):
+                a = book.schedule_arrays()
+                codes, code_index = np.unique(
+                    book.code.astype(str), return_inverse=True
+                )
+                columns = {
+                    "code": pa.DictionaryArray.from_arrays(
+                        pa.array(code_index[a["loan_index"]], type=pa.int32()),
+                        pa.array(codes),
+                    ),
+                    "payment_sequence": pa.array(
+                        a["payment_sequence"].astype(np.int32)
+                    ),
+                    "payment_date": pa.array(a["payment_date"], type=pa.date32()),
+                } | {c: to_amounts(a[c]) for c in amount_cols}
+                if partition_by == "payment_month":
+                    columns["payment_month"] = pa.array(
+                        a["payment_date"].astype("datetime64[M]").astype(str)
+                    )
+                yield pa.RecordBatch.from_arrays(
+                    [columns[name] for name in schema.names], schema=schema
+                )
+
+        ds.write_dataset(
+            iter_batches(),
+            str(path),
+            schema=schema,
+            format="parquet",
+            partitioning=[partition_by],
+            partitioning_flavor="hive",
+            existing_data_behavior="overwrite_or_ignore",
+            # Each loan is its own partition, and a batch can hold all loans
+            max_partitions=max(len(self), 1024) if partition_by == "code" else 1024,
+        )
+
+
+def validate_loans(f: DataFrame) -> DataFrame:
+    """
+    Check the given DataFrame of loans, one loan per row and one column
+    per :class:`Loan` true field, column by column at once,
+    with the same checks as :meth:`Loan.validate`, except that
+    ``num_payments_interest_only`` must also be an integer,
+    ``payment_freq`` cannot be ``"continuously"``,
+    and ``first_payment_date`` can be anything that Pandas can parse as a date.
+
+    Return a DataFrame reporting the errors found, if any, with the columns
+
+    - ``"row"``: index label of the offending row of ``f``
+    - ``"column"``: name of the offending column, or ``None`` if the error
+      involves several columns
+    - ``"error"``: error message
+
+    Raise a ``ValueError`` if ``f`` lacks some Loan true fields.
+    """
+    missing = Loan.true_fields() - set(f.columns)
+    if missing:
+        raise ValueError(f"Missing columns {sorted(missing)}")
+
+    def to_num(col):
+        return pd.to_numeric(f[col], errors="coerce")
+
+    def is_int(x):
+        return x.notna() & (x == x.round())
+
+    n = to_num("num_payments")
+    n_io = to_num("num_payments_interest_only")
+    checks = [
+        ("code", f["code"].map(lambda x: isinstance(x, str)), "Not a string"),
+        ("principal", to_num("principal") > 0, "Not a positive number"),
+        ("interest_rate", to_num("interest_rate") >= 0, "Not a nonnegative number"),
+        ("fee", to_num("fee") >= 0, "Not a nonnegative number"),
+        ("num_payments", is_int(n) & (n > 0), "Not a positive integer"),
+        (
+            "num_payments_interest_only",
+            is_int(n_io) & (n_io >= 0),
+            "Not a nonnegative integer",
+        ),
+        (
+            "payment_freq",
+            f["payment_freq"].isin(cs.NUM_BY_DISCRETE_FREQ),
+            f"Frequency must be one of {list(cs.NUM_BY_DISCRETE_FREQ)}",
+        ),
+        (
+            "compounding_freq",
+            f["compounding_freq"].isin(cs.NUM_BY_FREQ),
+            f"Frequency must be one of {list(cs.NUM_BY_FREQ)}",
+        ),
+        (
+            "first_payment_date",
+            pd.to_datetime(f["first_payment_date"], errors="coerce").notna(),
+            "Not a date",
+        ),
+        (
+            None,
+            ~(n_io > n),
+            "Number of interest only payments cannot exceed number of payments",
+        ),
+    ]
+    frames = [
+        pd.DataFrame(
+            {"row": f.index[~is_valid.to_numpy()], "column": col, "error": error}
+        )
+        for col, is_valid, error in checks
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_loans(
+    src: Union[str, pl.Path, DataFrame],
+) -> tuple[LoanBook, DataFrame]:
+    """
+    Read loans in bulk from the given source, which can be
+
+    - a DataFrame with one loan per row
+    - a path to a CSV file (``.csv``) or a JSON Lines file (``.jsonl``)
+      with one loan per row
+    - a path to a JSON file (``.json``) encoding a single loan as in
+      :func:`read_loan` or a list of loans
+    - a directory or glob pattern of such files
+
+    and with one column or key per :class:`Loan` true field.
+    Additional columns or keys will be ignored.
+    Read the codes of CSV files as strings.
+    Validate the loans all at once via :func:`validate_loans`.
+
+    Return a pair comprising a LoanBook of the valid loans and
+    the error report of :func:`validate_loans`.
+    """
+    if isinstance(src, DataFrame):
+        f = src
+    else:
+        path = pl.Path(src)
+        if path.is_dir():
+            paths = sorted(path.iterdir())
+        elif glob.has_magic(str(src)):
+            paths = sorted(pl.Path(p) for p in glob.glob(str(src)))
+        else:
+            paths = [path]
+
+        frames = []
+        for p in paths:
+            if p.suffix == ".csv":
+                # Read codes as strings, since CSV files are untyped
+                frames.append(pd.read_csv(p, dtype={"code": str}))
+            elif p.suffix == ".jsonl":
+                frames.append(pd.read_json(p, lines=True, dtype=False))
+            elif p.suffix == ".json":
+                with p.open() as src_file:
+                    params = json.load(src_file)
+                frames.append(
+                    pd.DataFrame(params if isinstance(params, list) else [params])
+                )
+
+        if not frames:
+            raise ValueError(f"No CSV, JSON Lines, or JSON files found at {src}")
+
+        f = pd.concat(frames, ignore_index=True)
+
+    errors = validate_loans(f)
+    f = f.drop(errors["row"].unique()).assign(
+        first_payment_date=lambda x: pd.to_datetime(x["first_payment_date"])
+    )
+    return LoanBook.from_frame(f), errors
@@ -1,19 +1,242 @@
+import io
 import pathlib as pl
 from dataclasses import dataclass
-from typing import Iterable, Optional
+from typing import BinaryIO, Iterable, Optional, Union, TYPE_CHECKING
 import tempfile
 import subprocess as sp
-import shutil
 import json
+import time
+import functools
+import warnings
+import threading
 import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
 
+import pandas as pd
 import voluptuous as vt
-import jinja2
-import weasyprint as wp
 
 from . import constants as cs
 from .loan import Loan
 
+if TYPE_CHECKING:
+    import jinja2
+    import weasyprint
+    from weasyprint.text.fonts import FontConfiguration
+
+
+#: Stylesheets to inline into the HTML versions of loan contracts
+STYLESHEET_PATHS = [
+    cs.THEME_DIR / "css" / "bootstrap-4.3.1.min.css",
+    cs.THEME_DIR / "css" / "style.css",
+]
+
+#: Formats that :func:`render_contracts` can render
+RENDER_FORMATS = ["rst", "html", "pdf"]
+
+
+#: Loan kind -> name of its loan contract template
+TEMPLATE_NAME_BY_KIND = {
+    "amortized": "amortized_loan_contract.rst",
+    "interest_only": "interest_only_loan_contract.rst",
+    "combination": "combination_loan_contract.rst",
+}
+
+# Registry of the Jinja2 environment that loads and caches the loan contract
+# templates, shared by all threads of this process
+_TEMPLATE_LOCK = threading.RLock()
+_TEMPLATE_REGISTRY = {
+    "template_dirs": [str(cs.THEME_DIR)],
+    "bytecode_cache_dir": None,
+    "env": None,
+}
+
+
+def configure_templates(
+    template_dirs: Iterable[pl.Path] = (),
+    bytecode_cache_dir: Optional[pl.Path] = None,
+) -> None:
+    """
+    Configure the loading of loan contract templates.
+    Look for templates first in the given template directories, in order,
+    and then in :const:`THEME_DIR`, so that templates named as in
+    :const:`TEMPLATE_NAME_BY_KIND` in the given directories override the
+    default ones.
+    If a bytecode cache directory is given, then also store compiled templates
+    there, so that other processes can skip compiling them.
+    Discard all previously compiled templates.
+    """
+    with _TEMPLATE_LOCK:
+        _TEMPLATE_REGISTRY["template_dirs"] = [str(d) for d in template_dirs] + [
+            str(cs.THEME_DIR)
+        ]
+        _TEMPLATE_REGISTRY["bytecode_cache_dir"] = (
+            str(bytecode_cache_dir) if bytecode_cache_dir is not None else None
+        )
+        _TEMPLATE_REGISTRY["env"] = None
+
+
+def get_template(name: str) -> "jinja2.Template":
+    """
+    Return the compiled loan contract template of the given name, as
+    configured by :func:`configure_templates`.
+    Compile each template only once per process, unless its file has been
+    modified since, in which case recompile it.
+    Thread-safe.
+    """
+    # Import here to keep importing this package fast
+    import jinja2
+
+    with _TEMPLATE_LOCK:
+        env = _TEMPLATE_REGISTRY["env"]
+        if env is None:
+            cache_dir = _TEMPLATE_REGISTRY["bytecode_cache_dir"]
+            if cache_dir is not None:
+                pl.Path(cache_dir).mkdir(parents=True, exist_ok=True)
+                bytecode_cache = jinja2.FileSystemBytecodeCache(cache_dir)
+            else:
+                bytecode_cache = None
+
+            # Auto-reloading checks template file modification times
+            env = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(_TEMPLATE_REGISTRY["template_dirs"]),
+                autoescape=jinja2.select_autoescape(["html", "xml"]),
+                lstrip_blocks=True,
+                trim_blocks=True,
+                auto_reload=True,
+                bytecode_cache=bytecode_cache,
+            )
+            _TEMPLATE_REGISTRY["env"] = env
+
+        return env.get_template(name)
+
+
+@functools.lru_cache
+def _get_font_config() -> "FontConfiguration":
+    """
+    Return a WeasyPrint font configuration, building it, which involves
+    font discovery, only once per process.
+    """
+    from weasyprint.text.fonts import FontConfiguration
+
+    return FontConfiguration()
+
+
+@functools.lru_cache
+def _get_theme_css() -> list["weasyprint.CSS"]:
+    """
+    Return the list of WeasyPrint CSS objects of the stylesheets at
+    :const:`STYLESHEET_PATHS`, parsing them only once per process.
+    """
+    import weasyprint as wp
+
+    font_config = _get_font_config()
+    return [
+        wp.CSS(filename=str(path), font_config=font_config) for path in STYLESHEET_PATHS
+    ]
+
+
+def _get_footer_css(footer_text: str) -> "weasyprint.CSS":
+    """
+    Return the WeasyPrint CSS object of :meth:`LoanContract.build_footer_css`
+    for the given footer text.
+    Unlike the theme stylesheets, this is not cached, since footer texts
+    are loan codes, which rarely repeat.
+    """
+    import weasyprint as wp
+
+    return wp.CSS(
+        string=LoanContract.build_footer_css(footer_text),
+        font_config=_get_font_config(),
+    )
+
+
+@functools.lru_cache
+def _get_inline_style() -> str:
+    """
+    Return an HTML style element containing the stylesheets at
+    :const:`STYLESHEET_PATHS`, serialized as rst2html5 does,
+    reading and serializing them only once per process.
+    """
+    # Import here to keep importing this package fast
+    from genshi.builder import tag
+    from genshi.core import Markup
+    from genshi.output import XHTMLSerializer
+
+    css = "".join(path.read_text() for path in STYLESHEET_PATHS)
+    return "".join(XHTMLSerializer()(tag(tag.style(Markup(css)))))
+
+
+def _rst_to_html(rst: str, *, inline_styles: bool = True) -> str:
+    """
+    Convert the given RST string to an HTML string, with the stylesheets at
+    :const:`STYLESHEET_PATHS` inlined if ``inline_styles``,
+    via the rst2html5 Docutils writer run in this process.
+    Produces the same output as :func:`_rst_to_html_cli`.
+    """
+    # Import here to keep importing this package fast
+    from docutils.core import publish_string
+    from rst2html5 import HTML5Writer
+
+    warning_stream = io.StringIO()
+    html = publish_string(
+        rst,
+        writer=HTML5Writer(),
+        settings_overrides={"warning_stream": warning_stream},
+    ).decode("utf-8")
+    if warning_stream.getvalue():
+        warnings.warn(f"rst2html5: {warning_stream.getvalue()}")
+
+    # Inline the cached stylesheets where rst2html5 would
+    if inline_styles:
+        html = html.replace("\n</head>", f"\n    {_get_inline_style()}\n</head>", 1)
+
+    return html
+
+
+def _rst_to_html_cli(rst: str) -> str:
+    """
+    Convert the given RST string to an HTML string, with the stylesheets at
+    :const:`STYLESHEET_PATHS` inlined, via the rst2html5 command line program
+    run on temporary files.
+    Raise a ``RuntimeError`` if rst2html5 fails.
+    """
+    with tempfile.TemporaryDirectory() as dirname:
+        root = pl.Path(dirname)
+        name = "contract"
+
+        with (root / f"{name}.rst").open("w") as tgt:
+            tgt.write(rst)
+
+        args = [
+            "rst2html5",
+        ]
+
+        for path in STYLESHEET_PATHS:
+            arg = str(path.resolve())
+            args.append(f"--stylesheet-inline={arg}")
+
+        args.extend(
+            [
+                f"{name}.rst",
+                f"{name}.html",
+            ]
+        )
+
+        cp = sp.run(
+            args,
+            cwd=str(root),
+            universal_newlines=True,
+            stdout=sp.PIPE,
+            stderr=sp.PIPE,
+        )
+        if cp.returncode:
+            raise RuntimeError(f"rst2html5 failed: {cp.stderr}")
+        elif cp.stderr:
+            warnings.warn(f"rst2html5: {cp.stderr}")
+
+        with (root / f"{name}.html").open() as src:
+            return src.read()
+
 
 @dataclass
 class LoanContract(Loan):
@@ -79,7 +302,8 @@ class LoanContract(Loan):
 
     def to_rst(self, out_path: Optional[str] = None):
         """
-        Return a RST version (string) of this loan contract.
+        Return a RST version (string) of this loan contract,
+        rendered from its template; see :func:`configure_templates`.
         If a file path is given, then save to there instead.
         """
         # Set context dict
@@ -99,21 +323,7 @@ class LoanContract(Loan):
         }
         context = self.__dict__ | a | b
 
-        if self.kind == "amortized":
-            template_path = cs.THEME_DIR / "amortized_loan_contract.rst"
-        elif self.kind == "interest_only":
-            template_path = cs.THEME_DIR / "interest_only_loan_contract.rst"
-        elif self.kind == "combination":
-            template_path = cs.THEME_DIR / "combination_loan_contract.rst"
-
-        template_path = pl.Path(template_path)
-        env = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(str(template_path.parent)),
-            autoescape=jinja2.select_autoescape(["html", "xml"]),
-            lstrip_blocks=True,
-            trim_blocks=True,
-        )
-        template = env.get_template(str(template_path.name))
+        template = get_template(TEMPLATE_NAME_BY_KIND[self.kind])
         rst = template.render(context)
 
         if out_path is not None:
@@ -123,59 +333,28 @@ class LoanContract(Loan):
         else:
             return rst
 
-    def to_html(self, out_path: Optional[str] = None) -> str:
+    def to_html(
+        self, out_path: Optional[str] = None, *, use_subprocess: bool = False
+    ) -> str:
         """
         Return an HTML version (string) of this contract.
-        Use the RST version produced by :func:`to_rst` and rst2html5.py.
+        Use the RST version produced by :func:`to_rst` and the rst2html5
+        Docutils writer, run in this process, or, if ``use_subprocess``,
+        via the slower rst2html5 command line program.
         If a file path is given, then save to there instead.
         """
-        # Build RST and save to temp file
-        with tempfile.TemporaryDirectory() as dirname:
-            root = pl.Path(dirname)
-            name = "contract"
-
-            rst = self.to_rst()
-            with (root / f"{name}.rst").open("w") as tgt:
-                tgt.write(rst)
-
-            args = [
-                "rst2html5",
-            ]
-
-            stylesheet_paths = [
-                cs.THEME_DIR / "css" / "bootstrap-4.3.1.min.css",
-                cs.THEME_DIR / "css" / "style.css",
-            ]
-            for path in stylesheet_paths:
-                arg = str(path.resolve())
-                args.append(f"--stylesheet-inline={arg}")
-
-            args.extend(
-                [
-                    f"{name}.rst",
-                    f"{name}.html",
-                ]
-            )
-
-            cp = sp.run(
-                args,
-                cwd=str(root),
-                universal_newlines=True,
-                stdout=sp.PIPE,
-                stderr=sp.PIPE,
-            )
-            if cp.stderr:
-                print("Failed:", cp.stderr)
-
-            if out_path is not None:
-                # Copy to out_path
-                shutil.copy(root / f"{name}.html", pl.Path(out_path))
+        rst = self.to_rst()
+        if use_subprocess:
+            html = _rst_to_html_cli(rst)
+        else:
+            html = _rst_to_html(rst)
 
-            else:
-                with (root / f"{name}.html").open() as src:
-                    html = src.read()
+        if out_path is not None:
+            with pl.Path(out_path).open("w") as tgt:
+                tgt.write(html)
 
-                return html
+        else:
+            return html
 
     @staticmethod
     def build_footer_css(footer_text):
@@ -190,34 +369,30 @@ class LoanContract(Loan):
             }}
             """
 
-    def to_pdf(self, out_path: Optional[str] = None):
+    def to_pdf(
+        self, out_path: Optional[Union[str, pl.Path, BinaryIO]] = None
+    ) -> Optional[bytes]:
         """
-        Return a PDF version (string) of this loan contract.
-        If a file path is given, then save to there instead.
+        Return a PDF version (bytes) of this loan contract.
+        If a file path or a writable binary stream, e.g. an HTTP response
+        or an upload buffer, is given, then write to there instead.
+        Render entirely in memory from the HTML version of :func:`to_html`,
+        without its inlined stylesheets, using theme stylesheets that are
+        parsed only once per process.
         """
-        # Put loan coad in footer
-        stylesheets = [wp.CSS(string=LoanContract.build_footer_css(self.code))]
+        # Import here to keep importing this package fast, since
+        # WeasyPrint loads native libraries on import
+        import weasyprint as wp
 
-        with tempfile.NamedTemporaryFile() as fp:
-            html_path = fp.name
-            self.to_html(html_path)
-
-            if out_path is not None:
-                (
-                    wp.HTML(filename=html_path).write_pdf(
-                        pl.Path(out_path), stylesheets=stylesheets
-                    )
-                )
-            else:
-                (
-                    wp.HTML(filename=html_path).write_pdf(
-                        html_path, stylesheets=stylesheets
-                    )
-                )
-                with pl.Path(html_path).open("rb") as src:
-                    pdf = src.read()
+        # Put loan coad in footer
+        stylesheets = _get_theme_css() + [_get_footer_css(self.code)]
+        html = _rst_to_html(self.to_rst(), inline_styles=False)
+        if out_path is not None and not hasattr(out_path, "write"):
+            out_path = pl.Path(out_path)
 
-                return pdf
+        return wp.HTML(string=html, base_url=str(cs.THEME_DIR)).write_pdf(
+            out_path, stylesheets=stylesheets, font_config=_get_font_config()
+        )
 
 
 def read_loan_contract(path: pl.PosixPath) -> "LoanContract":
@@ -247,3 +422,128 @@ def read_loan_contract(path: pl.PosixPath) -> "LoanContract":
     )
 
     return LoanContract(**pruned_params)
+
+
+def _warm_up_renderer(
+    formats: list[str],
+    template_dirs: list[str],
+    bytecode_cache_dir: Optional[str],
+) -> None:
+    """
+    Build the per-process rendering state needed for the given formats, namely
+    the contract templates, configured as in :func:`configure_templates`
+    with the given arguments and compiled, for HTML, the inlined stylesheets,
+    and, for PDFs, the parsed WeasyPrint stylesheets and font configuration.
+    Meant to initialize the worker processes of :func:`render_contracts`.
+    """
+    configure_templates(template_dirs, bytecode_cache_dir)
+    for name in TEMPLATE_NAME_BY_KIND.values():
+        get_template(name)
+    if "html" in formats:
+        _get_inline_style()
+    if "pdf" in formats:
+        _get_theme_css()
+
+
+def _render_contract(
+    contract: LoanContract, out_dir: pl.Path, formats: list[str]
+) -> list[dict]:
+    """
+    Render the given loan contract to a file in the given directory for
+    each of the given formats.
+    Return a list of report records, one per format, as described in
+    :func:`render_contracts`.
+    """
+    records = []
+    for fmt in formats:
+        path = out_dir / f"{contract.code}.{fmt}"
+        t = time.perf_counter()
+        try:
+            getattr(contract, f"to_{fmt}")(path)
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        records.append(
+            {
+                "code": contract.code,
+                "format": fmt,
+                "path": str(path),
+                "seconds": time.perf_counter() - t,
+                "error": error,
+            }
+        )
+    return records
+
+
+def render_contracts(
+    contracts: Iterable[LoanContract],
+    out_dir: pl.Path,
+    formats: Iterable[str] = ("pdf",),
+    workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Render the given loan contracts in the given formats (a subset of
+    :const:`RENDER_FORMATS`) to the files ``<out_dir>/<contract code>.<format>``,
+    creating the directory if necessary.
+    Spread the work across a pool of the given number of worker processes,
+    defaulting to the number of CPUs, each of which builds its rendering state
+    once up front and reuses it for all its contracts.
+    If ``workers == 1``, then render in this process instead.
+
+    Return a DataFrame with one row per contract and format, in the order given,
+    and the columns
+
+    - ``"code"``: code of the loan contract
+    - ``"format"``
+    - ``"path"``: path of the rendered file
+    - ``"seconds"``: float; time taken to render
+    - ``"error"``: error message if the rendering failed, else ``None``
+
+    Raise a ``ValueError`` if an invalid format is given.
+    """
+    formats = list(formats)
+    invalid = set(formats) - set(RENDER_FORMATS)
+    if invalid:
+        raise ValueError(
+            f"Invalid formats {invalid}. Formats must be among {RENDER_FORMATS}"
+        )
+
+    out_dir = pl.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    contracts = list(contracts)
+
+    records = []
+    if workers == 1:
+        for contract in contracts:
+            records.extend(_render_contract(contract, out_dir, formats))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_warm_up_renderer,
+            initargs=(
+                formats,
+                _TEMPLATE_REGISTRY["template_dirs"][:-1],
+                _TEMPLATE_REGISTRY["bytecode_cache_dir"],
+            ),
+        ) as executor:
+            futures = [
+                executor.submit(_render_contract, contract, out_dir, formats)
+                for contract in contracts
+            ]
+            for contract, future in zip(contracts, futures):
+                try:
+                    records.extend(future.result())
+                except Exception as e:
+                    # Worker crashed, so record failure for every format
+                    records.extend(
+                        {
+                            "code": contract.code,
+                            "format": fmt,
+                            "path": str(out_dir / f"{contract.code}.{fmt}"),
+                            "seconds": None,
+                            "error": f"{type(e).__name__}: {e}",
+                        }
+                        for fmt in formats
+                    )
+
+    return pd.DataFrame(records, columns=["code", "format", "path", "seconds", "error"])
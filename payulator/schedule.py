@@ -0,0 +1,131 @@
+"""
+Module defining the Schedule class, a compact array-backed payment schedule.
+"""
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+if TYPE_CHECKING:
+    import pyarrow
+
+
+#: Schedule column name -> NumPy dtype
+SCHEDULE_DTYPES = {
+    "payment_sequence": np.dtype(np.int32),
+    "payment_date": np.dtype("datetime64[ns]"),
+    "beginning_balance": np.dtype(np.float64),
+    "principal_payment": np.dtype(np.float64),
+    "ending_balance": np.dtype(np.float64),
+    "interest_payment": np.dtype(np.float64),
+    "fee_payment": np.dtype(np.float64),
+    "total_payment": np.dtype(np.float64),
+}
+
+
+class Schedule:
+    """
+    A payment schedule stored as one contiguous NumPy array per column,
+    with the columns and dtypes of :const:`SCHEDULE_DTYPES`, that is, the
+    payment schedule columns of :meth:`Loan.payments` except ``"notes"``.
+    Much lighter than a DataFrame, and convertible to a DataFrame or an
+    Arrow table without copying the data.
+
+    The money columns, that is, the float columns, can instead all be int64
+    arrays of minor units, as output by ``Loan.payments(exact=True)``.
+
+    Index a Schedule by column name to get the column array.
+
+    The attribute ``interest_rates`` holds the annual interest rates of the
+    Schedule as a tuple of pairs (period, rate), each rate applying from the
+    payment after its period on, if known, e.g. as set by
+    :meth:`Loan.reschedule`, else ``None``.
+    """
+
+    __slots__ = tuple(SCHEDULE_DTYPES) + ("interest_rates",)
+
+    def __init__(
+        self, *, interest_rates: Optional[tuple] = None, **columns: np.ndarray
+    ) -> None:
+        if set(columns) != set(SCHEDULE_DTYPES):
+            raise ValueError(f"Schedule columns must be {list(SCHEDULE_DTYPES)}")
+
+        # Keep money columns in integer minor units if given so
+        is_exact = all(
+            np.asarray(columns[name]).dtype.kind in "iu"
+            for name, dtype in SCHEDULE_DTYPES.items()
+            if dtype.kind == "f"
+        )
+
+        lengths = set()
+        for name, dtype in SCHEDULE_DTYPES.items():
+            if is_exact and dtype.kind == "f":
+                dtype = np.dtype(np.int64)
+            a = np.ascontiguousarray(columns[name], dtype=dtype)
+            lengths.add(a.shape)
+            setattr(self, name, a)
+
+        if len(lengths) != 1 or len(next(iter(lengths))) != 1:
+            raise ValueError("Schedule columns must be 1-D arrays of equal length")
+
+        self.interest_rates = interest_rates
+
+    def __len__(self) -> int:
+        return self.payment_sequence.shape[0]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name not in SCHEDULE_DTYPES:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __repr__(self) -> str:
+        return f"Schedule(num_payments={len(self)})"
+
+    @property
+    def columns(self) -> list[str]:
+        """
+        Return the list of column names of this Schedule.
+        """
+        return list(SCHEDULE_DTYPES)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Return the number of bytes taken by the column arrays of this Schedule.
+        """
+        return sum(getattr(self, name).nbytes for name in SCHEDULE_DTYPES)
+
+    def round(self, decimals: int = 2) -> "Schedule":
+        """
+        Return a new Schedule with the float columns of this Schedule rounded
+        to the given number of decimal places.
+        """
+        columns = {name: getattr(self, name) for name in SCHEDULE_DTYPES}
+        return Schedule(
+            interest_rates=self.interest_rates,
+            **{
+                name: np.round(a, decimals) if a.dtype.kind == "f" else a
+                for name, a in columns.items()
+            },
+        )
+
+    def to_pandas(self) -> DataFrame:
+        """
+        Return a DataFrame version of this Schedule whose columns share
+        memory with the column arrays of this Schedule.
+        """
+        return pd.DataFrame(
+            {name: getattr(self, name) for name in SCHEDULE_DTYPES}, copy=False
+        )
+
+    def to_arrow(self) -> "pyarrow.Table":
+        """
+        Return an Arrow table version of this Schedule whose columns share
+        memory with the column arrays of this Schedule.
+        Requires the optional dependency PyArrow.
+        """
+        # Import here, since PyArrow is optional
+        import pyarrow as pa
+
+        return pa.table({name: getattr(self, name) for name in SCHEDULE_DTYPES})
@@ -0,0 +1,179 @@
+"""
+Module for the Monte Carlo simulation of loan cashflows under stochastic
+prepayment and default.
+"""
+from typing import Iterable, Optional, Union
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from . import helpers as hp
+from .loan import Loan
+from .loan_book import LoanBook
+
+
+# State shared by all the simulation blocks run in this process; set once per
+# worker process by :func:`_init_simulation`
+_SIMULATION_STATE = {}
+
+
+def _init_simulation(state: dict) -> None:
+    """
+    Store the given simulation state, built by :func:`simulate_cashflows`,
+    for the simulation blocks run in this process.
+    """
+    _SIMULATION_STATE.clear()
+    _SIMULATION_STATE.update(state)
+
+
+def _simulate_block(seed: np.random.SeedSequence, num_paths: int) -> np.ndarray:
+    """
+    Simulate the given number of paths with a random stream seeded by the given
+    seed sequence, using the state set by :func:`_init_simulation`.
+    Return the array of cashflows of shape ``(num_paths, number of dates)``.
+    """
+    s = _SIMULATION_STATE
+    # Separate streams for default and prepayment, so that drawing them
+    # chunk by chunk yields the same paths whatever the chunk size
+    rng_default, rng_prepay = (np.random.default_rng(x) for x in seed.spawn(2))
+    num_dates = s["dates"].shape[0]
+    n = np.diff(s["offsets"])
+    out = np.zeros((num_paths, num_dates))
+
+    # First periods of default and prepayment of each loan on the given
+    # number of paths, which are independent geometric random variables.
+    # Periods past the term mean no event.
+    def sample(rng, p, m):
+        t = rng.geometric(np.where(p > 0, p, 1), size=(m, n.shape[0]))
+        return np.where(p > 0, np.minimum(t, n + 1), n + 1)
+
+    # Lay out the paths in blocks of rows of at most about chunk_size elements,
+    # and draw their events likewise
+    num_rows = s["total_payment"].shape[0]
+    step = max(1, s["chunk_size"] // max(num_rows, 1))
+    for start in range(0, num_paths, step):
+        paths = np.arange(start, min(start + step, num_paths))
+        t_default = sample(rng_default, s["mdr"], paths.shape[0])
+        t_prepay = sample(rng_prepay, s["smm"], paths.shape[0])
+        # A default and a prepayment in the same period count as a default
+        t = np.minimum(t_default, t_prepay)[:, s["loan_index"]]
+        is_default = (t_default <= t_prepay)[:, s["loan_index"]]
+        seq = s["payment_sequence"][None, :]
+        cash = np.where(seq < t, s["total_payment"], 0.0)
+        cash += np.where(
+            seq == t,
+            np.where(
+                is_default,
+                s["recovery"],
+                s["total_payment"] + s["ending_balance"],
+            ),
+            0.0,
+        )
+        # Sum the cashflows of these paths by date into their output rows only
+        m = paths.shape[0]
+        idx = (paths[:, None] - start) * num_dates + s["date_index"][None, :]
+        out[start : start + m] = np.bincount(
+            idx.ravel(), weights=cash.ravel(), minlength=m * num_dates
+        ).reshape(m, num_dates)
+
+    return out
+
+
+def simulate_cashflows(
+    loans: Union[LoanBook, Iterable[Loan]],
+    num_paths: int,
+    cpr: Union[float, np.ndarray] = 0.0,
+    cdr: Union[float, np.ndarray] = 0.0,
+    recovery_rate: Union[float, np.ndarray] = 0.0,
+    percentiles: Iterable[float] = (5, 50, 95),
+    seed: Optional[int] = None,
+    block_size: int = 1000,
+    chunk_size: int = 10_000_000,
+    workers: Optional[int] = 1,
+) -> DataFrame:
+    """
+    Simulate the cashflows of the given LoanBook or Loans on the given number
+    of paths under random prepayment and default, and summarize them per
+    payment date.
+
+    On each path, each loan pays its contractual unrounded total payments,
+    fees included, as given by ``LoanBook.schedule_arrays``, until
+
+    - it prepays in full, in which case it pays its total payment and its
+      ending balance on that date, or
+    - it defaults, in which case it pays the recovery rate times its beginning
+      balance on that date,
+
+    and then stops.
+    In each payment period, a loan defaults with the monthly default rate
+    (MDR) ``1 - (1 - cdr)**(1 / k)`` and, failing that, prepays with the
+    single monthly mortality (SMM) ``1 - (1 - cpr)**(1 / k)``, where ``k``
+    is its number of payments per year, ``cdr`` its annual constant default
+    rate, and ``cpr`` its annual constant prepayment rate.
+    The rates ``cpr``, ``cdr``, and ``recovery_rate`` are scalars or arrays of
+    one value per loan.
+
+    Simulate the paths in blocks of ``block_size`` paths, each with its own
+    random stream spawned from the given seed, so that results are
+    reproducible whatever the number of workers, and draw and lay out each
+    block in chunks of about ``chunk_size`` cashflows to bound memory use.
+    Spread the blocks across a pool of the given number of worker processes,
+    which defaults to the number of CPUs if ``None``, or run them in this
+    process if ``workers == 1``.
+
+    Return a DataFrame with one row per payment date and the columns
+
+    - ``"payment_date"``
+    - ``"mean"``: float; mean cashflow over the paths
+    - ``"p<q>"``: float; the ``q``-th percentile of the cashflow over the paths,
+      for each ``q`` in the given percentiles
+
+    """
+    book = loans if isinstance(loans, LoanBook) else LoanBook.from_loans(loans)
+    L = len(book)
+    a = book.schedule_arrays()
+    loan = a["loan_index"]
+
+    k = hp._freqs_to_nums(book.payment_freq)
+    cpr, cdr, recovery_rate = (
+        np.broadcast_to(np.asarray(x, dtype=float), (L,))
+        for x in (cpr, cdr, recovery_rate)
+    )
+    dates, date_index = np.unique(a["payment_date"], return_inverse=True)
+
+    state = {
+        "offsets": a["offsets"],
+        "loan_index": loan,
+        "payment_sequence": a["payment_sequence"],
+        "date_index": date_index,
+        "dates": dates,
+        "total_payment": a["total_payment"],
+        "ending_balance": a["ending_balance"],
+        "recovery": recovery_rate[loan] * a["beginning_balance"],
+        "smm": 1 - (1 - cpr) ** (1 / k),
+        "mdr": 1 - (1 - cdr) ** (1 / k),
+        "chunk_size": chunk_size,
+    }
+
+    # One reproducible random stream per block of paths
+    sizes = [min(block_size, num_paths - i) for i in range(0, num_paths, block_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    if workers == 1:
+        _init_simulation(state)
+        blocks = [_simulate_block(s, m) for s, m in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_simulation, initargs=(state,)
+        ) as executor:
+            blocks = list(executor.map(_simulate_block, seeds, sizes))
+
+    cash = np.concatenate(blocks)
+    f = pd.DataFrame({"payment_date": dates.astype("datetime64[ns]")})
+    f["mean"] = cash.mean(axis=0)
+    for q in percentiles:
+        f[f"p{q:g}"] = np.percentile(cash, q, axis=0)
+
+    return f
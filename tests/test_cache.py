@@ -0,0 +1,119 @@
+import os
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from .context import payulator
+import payulator as pl
+
+
+def build_loan(**kwargs):
+    return pl.Loan(
+        **{
+            "code": "A",
+            "principal": 1000,
+            "interest_rate": 0.05,
+            "payment_freq": "monthly",
+            "compounding_freq": "quarterly",
+            "num_payments": 3 * 12,
+            "num_payments_interest_only": 12,
+            "fee": 10,
+            "first_payment_date": dt.date(2018, 1, 31),
+        }
+        | kwargs
+    )
+
+
+def test_key():
+    loan = build_loan()
+    key = pl.ScheduleCache.key(loan)
+    assert key == pl.ScheduleCache.key(build_loan())
+    assert key != pl.ScheduleCache.key(build_loan(interest_rate=0.06))
+    assert key != pl.ScheduleCache.key(loan, decimals=None)
+    assert key != pl.ScheduleCache.key(loan, exact=True)
+
+    # Equal loans with differently typed fields have equal keys
+    assert key == pl.ScheduleCache.key(build_loan(principal=1000.0))
+    attrs = {k: getattr(loan, k) for k in loan.true_fields()}
+    loan_2 = pl.Loan.from_validated(**attrs | {"num_payments": np.int64(36)})
+    assert key == pl.ScheduleCache.key(loan_2)
+
+
+def test_payments(tmp_path):
+    cache = pl.ScheduleCache(tmp_path)
+    loan = build_loan()
+    expect = loan.payments()
+
+    get = cache.payments(loan)
+    assert cache.cache_info()[:4] == (0, 1, 0, 1)
+    for output in ["frame", "array"]:
+        get = cache.payments(loan, output=output)
+        f = get.pop("payment_schedule")
+        if output == "array":
+            assert isinstance(f, pl.Schedule)
+            assert isinstance(f["total_payment"].base, np.memmap)
+            f = f.to_pandas().assign(notes=np.nan)
+        pd.testing.assert_frame_equal(
+            f,
+            expect["payment_schedule"],
+            check_dtype=output == "frame",
+            check_exact=True,
+        )
+        assert get == {k: v for k, v in expect.items() if k != "payment_schedule"}
+
+    info = cache.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+    assert info.num_bytes > 0
+
+    # Exact schedules of combination loans
+    get = cache.payments(loan, exact=True)
+    get = cache.payments(loan, exact=True)
+    assert get["payment_schedule"]["principal_payment"].dtype == np.int64
+    assert isinstance(get["first_payment_date"]["amortized"], dt.date)
+
+    # Shared across instances
+    assert pl.ScheduleCache(tmp_path).get(loan) is not None
+
+    cache.clear()
+    assert cache.cache_info()[:5] == (0, 0, 0, 0, 0)
+    assert cache.get(loan) is None
+
+
+def test_payments_frame(tmp_path):
+    # Cache hits and misses return the same kind of DataFrame
+    cache = pl.ScheduleCache(tmp_path)
+    loan = build_loan()
+    for exact in [False, True]:
+        miss = cache.payments(loan, exact=exact)["payment_schedule"]
+        hit = cache.payments(loan, exact=exact)["payment_schedule"]
+        pd.testing.assert_series_equal(hit.dtypes, miss.dtypes)
+        for f in [miss, hit]:
+            f.loc[0, "total_payment"] = 0
+            assert f.loc[0, "total_payment"] == 0
+
+        # Writing to a hit leaves the cache entry intact
+        f = cache.get(loan, exact=exact)["payment_schedule"]
+        assert f.loc[0, "total_payment"] > 0
+
+    assert cache.cache_info()[:2] == (4, 2)
+
+
+def test_evict(tmp_path):
+    cache = pl.ScheduleCache(tmp_path)
+    loans = [build_loan(code=str(i)) for i in range(3)]
+    for i, loan in enumerate(loans):
+        cache.payments(loan)
+        os.utime(tmp_path / cache.key(loan), (i, i))
+    size = cache.cache_info().num_bytes // 3
+
+    # Using the first loan makes the second one least recently used
+    cache.get(loans[0])
+    cache.max_bytes = 3 * size
+    cache.payments(build_loan(code="3"))
+    info = cache.cache_info()
+    assert info.evictions == 1
+    assert info.num_entries == 3
+    assert cache.get(loans[1]) is None
+    assert cache.get(loans[0]) is not None
@@ -39,6 +39,8 @@ def test_to_date_offset():
         assert isinstance(pl.to_date_offset(k), pd.DateOffset)
 
     assert pl.to_date_offset(10) is None
+    assert pl.to_date_offset(12) == pd.DateOffset(months=1)
+    assert pl.to_date_offset(26) == pd.DateOffset(weeks=2)
 
 
 def test_amortize():
@@ -55,6 +57,21 @@ def test_compute_period_interest_rate():
     I = pl.compute_period_interest_rate(0.12, "monthly", "monthly")
     assert round(I, 2) == 0.01
 
+    # Check memoization
+    pl.compute_period_interest_rate.cache_clear()
+    for __ in range(3):
+        pl.compute_period_interest_rate(0.12, "continuously", "weekly")
+    info = pl.compute_period_interest_rate.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+
+    # Arrays bypass the cache
+    for freq in ["monthly", "continuously"]:
+        get = pl.compute_period_interest_rate(np.array([0.1, 0.2]), freq, "monthly")
+        expect = [
+            pl.compute_period_interest_rate(i, freq, "monthly") for i in [0.1, 0.2]
+        ]
+        assert np.allclose(get, expect)
+
 
 def test_build_principal_fn():
     balances = [
@@ -118,3 +135,259 @@ def test_aggregate_payment_schedules():
         "total_payment_cumsum",
     }
     assert f.shape[0] == 3
+
+    # Stream loans through a generator in small chunks
+    loans = [
+        pl.Loan(
+            code=str(i),
+            principal=1000,
+            interest_rate=0.05,
+            compounding_freq="quarterly",
+            payment_freq=freq,
+            num_payments=12,
+            num_payments_interest_only=0,
+            fee=10,
+            first_payment_date=dt.date(2018 + i, 1, 1),
+        )
+        for i, freq in enumerate(["monthly", "weekly", "annually"])
+    ]
+    expect = pl.aggregate_payment_schedules(
+        [loan.payments()["payment_schedule"] for loan in loans], freq="MS"
+    )
+    get = pl.aggregate_payment_schedules(
+        (loan for loan in loans), freq="MS", chunk_size=1
+    )
+    pd.testing.assert_frame_equal(get, expect, check_dtype=False)
+
+    with pytest.raises(ValueError):
+        pl.aggregate_payment_schedules(iter([]))
+
+
+def test_compute_principal_balances():
+    p = pl.build_principal_fn(100, 0.07, "monthly", "monthly", 12)
+    b = pl.compute_principal_balances(100, 0.07, "monthly", "monthly", 12)
+    assert b.shape == (13,)
+    assert np.allclose(b, [p(i) for i in range(13)])
+    assert b[-1] == 0
+
+    b = pl.compute_principal_balances(120, 0, "monthly", "monthly", 12, t=[0, 6])
+    assert b.tolist() == [120, 60]
+
+
+def test_amortized_payments_and_balances():
+    P = np.array([100, 120, 50])
+    I = np.array([0.07 / 12, 0, 0.01])
+    n = np.array([12, 12, 0])
+    A = pl.helpers._amortized_payments(P, I, n)
+    assert np.allclose(A, [pl.amortize(100, 0.07, "monthly", "monthly", 12), 10, 0])
+
+    p = pl.build_principal_fn(100, 0.07, "monthly", "monthly", 12)
+    b = pl.helpers._principal_balances(P, I, n, np.array([[0], [6], [12]]))
+    assert np.allclose(b, [[100, 120, 50], [p(6), 60, 50], [0, 0, 50]])
+
+
+def test_shift_dates():
+    dates = [dt.date(2020, 1, 31), dt.date(2019, 2, 28), dt.date(2021, 12, 30)]
+    for k in [1, 2, 3, 4, 6, 12, 26, 52, 365]:
+        for date in dates:
+            expect = [pd.Timestamp(date) + j * pl.to_date_offset(k) for j in range(40)]
+            get = pl.shift_dates(date, k, np.arange(40))
+            assert get.dtype == np.dtype("datetime64[D]")
+            assert pd.to_datetime(get).tolist() == expect
+
+    # Broadcast across dates and frequencies
+    get = pl.shift_dates(dates, [12, 52, 365], 2)
+    assert get.tolist() == [
+        dt.date(2020, 3, 31),
+        dt.date(2019, 3, 14),
+        dt.date(2022, 1, 1),
+    ]
+
+
+def test_build_payment_dates():
+    get = pl.build_payment_dates(dt.date(2020, 1, 31), 12, 3)
+    assert get.tolist() == [
+        dt.date(2020, 1, 31),
+        dt.date(2020, 2, 29),
+        dt.date(2020, 3, 31),
+    ]
+
+
+def test_aggregate_payment_schedules_rounding():
+    loans = [
+        pl.Loan(
+            code=str(i),
+            principal=1000 + i,
+            interest_rate=0.0731,
+            compounding_freq="continuously",
+            payment_freq="monthly",
+            num_payments=37,
+            num_payments_interest_only=0,
+            fee=0,
+            first_payment_date=dt.date(2018, 1, 1),
+        )
+        for i in range(20)
+    ]
+    # Deferred rounding
+    f = pl.aggregate_payment_schedules(
+        [loan.payments(decimals=None)["payment_schedule"] for loan in loans],
+        freq="YE",
+    )
+    g = pl.aggregate_payment_schedules(loans, freq="YE", decimals=2)
+    assert np.allclose(g["total_payment"], f["total_payment"].round(2))
+
+    # Exact sums of payments rounded to cents
+    g = pl.aggregate_payment_schedules(loans, freq="YE", decimals=2, exact=True)
+    schedules = [loan.payments()["payment_schedule"] for loan in loans]
+    expect = sum(int(round(x * 100)) for s in schedules for x in s["fee_payment"])
+    assert round(g["fee_payment"].sum() * 100) == expect
+    schedules = [loan.payments(exact=True)["payment_schedule"] for loan in loans]
+    expect = sum(s["interest_payment"].sum() for s in schedules)
+    assert round(g["interest_payment"].sum() * 100) == expect
+    assert round(g["principal_payment"].sum() * 100) == sum(
+        round(loan.principal * 100) for loan in loans
+    )
+
+    # Loans and float schedules mixed in one chunk
+    loan = loans[0]
+    mixed = [loan, loan.payments()["payment_schedule"]]
+    g = pl.aggregate_payment_schedules(mixed, decimals=2, exact=True)
+    assert np.isclose(g["principal_payment"].sum(), 2 * loan.principal)
+    h = pl.aggregate_payment_schedules(mixed, decimals=2, exact=True, chunk_size=1)
+    pd.testing.assert_frame_equal(g, h)
+
+    with pytest.raises(ValueError):
+        pl.aggregate_payment_schedules(loans, exact=True)
+
+
+def test_to_minor_units():
+    offsets = np.array([0, 2, 3])
+    d = pl.to_minor_units(
+        offsets,
+        beginning_balance=[100.004, 50.006, 10],
+        principal_payment=[49.998, 50.006, 10],
+        interest_payment=[1.0, 0.5, 0.0049],
+        fee_payment=[1.005, 0, 0],
+    )
+    assert all(v.dtype == np.int64 for v in d.values())
+    assert d["beginning_balance"].tolist() == [10000, 5001, 1000]
+    assert d["principal_payment"].tolist() == [4999, 5001, 1000]
+    assert d["ending_balance"].tolist() == [5001, 0, 0]
+    # Level payment kept, final payment absorbs the residual
+    assert d["interest_payment"].tolist() == [101, 50, 0]
+    assert (
+        d["total_payment"]
+        == d["fee_payment"] + d["principal_payment"] + d["interest_payment"]
+    ).all()
+
+
+def test_solvers():
+    rng = np.random.default_rng(0)
+    N = 1000
+    P = rng.uniform(100, 1e6, N)
+    i = rng.uniform(0, 0.3, N)
+    n = rng.integers(1, 360, N)
+    cfreqs = rng.choice(["continuously", "monthly", "annually", "daily"], N)
+    pfreqs = rng.choice(["monthly", "weekly", "quarterly"], N)
+    i[:10] = 0
+    A = np.array(
+        [pl.amortize(*args) for args in zip(P, i, cfreqs, pfreqs, n)], dtype=float
+    )
+
+    assert np.allclose(pl.solve_principal(A, i, cfreqs, pfreqs, n), P)
+    assert np.allclose(pl.solve_num_payments(P, A, i, cfreqs, pfreqs), n)
+    assert np.allclose(
+        pl.solve_interest_rate(P, A, cfreqs, pfreqs, n), i, rtol=1e-8, atol=1e-10
+    )
+
+    # Scalars and broadcasting
+    A = pl.amortize(1000, 0.05, "continuously", "monthly", 36)
+    assert np.isclose(pl.solve_principal(A, 0.05, "continuously", "monthly", 36), 1000)
+    get = pl.solve_interest_rate(1000, A, "continuously", "monthly", [36, 48])
+    assert np.isclose(get[0], 0.05)
+    assert get[1] > 0.05
+
+    # Zero rate payments should round-trip despite floating point error
+    P = np.random.default_rng(1).uniform(100, 100_000, 500)
+    n = np.arange(1, 501)
+    A = np.array([pl.amortize(p, 0, "monthly", "monthly", k) for p, k in zip(P, n)])
+    assert (pl.solve_interest_rate(P, A, "monthly", "monthly", n) == 0).all()
+
+    # Payments too small
+    assert np.isinf(pl.solve_num_payments(1000, 1, 0.12, "monthly", "monthly"))
+    assert np.isnan(pl.solve_interest_rate(1000, 1, "monthly", "monthly", 12))
+
+
+def test_compute_irrs():
+    # Amortized payments without fees return the period interest rates
+    P = np.array([1000, 500, 2000])
+    I = np.array([0.01, 0.0, 0.03])
+    n = np.array([12, 5, 30])
+    A = P / np.where(I == 0, n, (1 - (1 + I) ** (-n.astype(float))) / I)
+    padded = np.full((3, 30), np.nan)
+    for i in range(3):
+        padded[i, : n[i]] = A[i]
+    offsets = np.concatenate([[0], np.cumsum(n)])
+    ragged = np.repeat(A, n)
+
+    assert np.allclose(pl.compute_irrs(P, padded), I)
+    assert np.allclose(pl.compute_irrs(P, ragged, offsets), I)
+
+    # Payments totalling less than the principal
+    assert pl.compute_irrs(100, [50, 40])[0] < 0
+
+    get = pl.compute_aprs(P, ragged, ["monthly", "weekly", "quarterly"], offsets)
+    assert np.allclose(get, I * [12, 52, 4])
+    get = pl.compute_aprs(P, padded, "monthly", effective=True)
+    assert np.allclose(get, (1 + I) ** 12 - 1)
+
+
+def test_build_discount_factors():
+    times = np.array([0, 0.5, 1, 2, 10])
+    df = pl.build_discount_factors(times, [0.05, {1: 0.02, 2: 0.04}])
+    assert df.shape == (5, 2)
+    assert np.allclose(df[:, 0], 1.05 ** (-times))
+    assert np.allclose(
+        df[:, 1], (1 + np.array([0.02, 0.02, 0.02, 0.04, 0.04])) ** (-times)
+    )
+
+    df = pl.build_discount_factors(times, [0.05], "continuously")
+    assert np.allclose(df[:, 0], np.exp(-0.05 * times))
+
+    with pytest.raises(ValueError):
+        pl.build_discount_factors(times, ["bingo"])
+
+
+def test_compute_npvs():
+    valuation_date = dt.date(2020, 1, 1)
+    dates = np.array(
+        [
+            ["2019-12-01", "2021-01-01", "2022-01-01"],
+            ["2021-01-01", "NaT", "NaT"],
+        ],
+        dtype="datetime64[D]",
+    )
+    payments = np.array([[100, 100, 100], [50, np.nan, np.nan]])
+    t1 = 366 / 365
+    t2 = 731 / 365
+    curves = [0, 0.1, {1: 0.1, 2: 0.2}]
+    expect = np.array(
+        [
+            [200, 100 / 1.1**t1 + 100 / 1.1**t2, 0],
+            [50, 50 / 1.1**t1, 0],
+        ]
+    )
+    r = np.interp([t1, t2], [1, 2], [0.1, 0.2])
+    expect[:, 2] = [
+        100 / (1 + r[0]) ** t1 + 100 / (1 + r[1]) ** t2,
+        50 / (1 + r[0]) ** t1,
+    ]
+
+    get = pl.compute_npvs(dates, payments, curves, valuation_date)
+    assert np.allclose(get, expect)
+
+    # Ragged layout
+    get = pl.compute_npvs(
+        dates.ravel()[:4], payments.ravel()[:4], curves, valuation_date, [0, 3, 4]
+    )
+    assert np.allclose(get, expect)
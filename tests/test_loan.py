@@ -1,6 +1,8 @@
+import time
 import datetime as dt
 from copy import copy
 
+import numpy as np
 import pytest
 import voluptuous as vt
 
@@ -276,3 +278,238 @@ def test_read_loan():
     path = DATA_DIR / "bad_loan_params.json"
     with pytest.raises(vt.MultipleInvalid):
         pl.read_loan(path)
+
+
+def test_summary():
+    for num_payments_interest_only in [0, 12, 4 * 12]:
+        loan = pl.Loan(
+            code="",
+            principal=1000,
+            interest_rate=0.05,
+            payment_freq="monthly",
+            compounding_freq="quarterly",
+            num_payments=4 * 12,
+            num_payments_interest_only=num_payments_interest_only,
+            fee=10,
+            first_payment_date=dt.date(2018, 1, 31),
+        )
+        s = loan.summary(decimals=None)
+        expect = loan.payments(decimals=None)
+        assert set(s.keys()) == set(expect.keys()) - {"payment_schedule"}
+        for key, val in s.items():
+            if isinstance(val, float):
+                assert val == pytest.approx(expect[key])
+            else:
+                assert val == expect[key]
+
+
+def test_from_validated():
+    params = {
+        "code": "",
+        "principal": 1000,
+        "interest_rate": 0.05,
+        "payment_freq": "monthly",
+        "compounding_freq": "quarterly",
+        "num_payments": 3 * 12,
+        "num_payments_interest_only": 12,
+        "fee": 10,
+        "first_payment_date": dt.date(2018, 1, 1),
+    }
+    loan = pl.Loan(**params)
+    assert pl.Loan.from_validated(**params) == loan
+    assert loan.copy() == loan
+    assert loan.copy() is not loan
+
+    with pytest.raises(TypeError):
+        pl.Loan.from_validated(code="x")
+
+
+@pytest.mark.slow
+def test_from_validated_benchmark():
+    # Benchmark deriving and scheduling the parts of a combination loan
+    # with and without re-validation
+    loan = pl.Loan(
+        code="",
+        principal=1000,
+        interest_rate=0.05,
+        payment_freq="monthly",
+        compounding_freq="quarterly",
+        num_payments=3 * 12,
+        num_payments_interest_only=12,
+        fee=10,
+        first_payment_date=dt.date(2018, 1, 1),
+    )
+
+    attrs = [
+        {k: getattr(part, k) for k in part.true_fields()}
+        for part in [loan.interest_only_part(), loan.amortized_part()]
+    ]
+
+    def validated_parts():
+        return [pl.Loan(**a) for a in attrs]
+
+    def trusted_parts():
+        return [pl.Loan.from_validated(**a) for a in attrs]
+
+    # Time the derivation of the parts apart from their scheduling,
+    # whose cost dwarfs it and does not depend on it
+    elapsed = {}
+    for name, build in [("validated", validated_parts), ("trusted", trusted_parts)]:
+        t = time.perf_counter()
+        for __ in range(2000):
+            build()
+        elapsed[name] = time.perf_counter() - t
+
+    assert elapsed["trusted"] < elapsed["validated"]
+
+    # The trusted parts schedule the combination loan
+    p = loan.payments()
+    parts = [part.payments() for part in trusted_parts()]
+    assert p["interest_total"] == pytest.approx(sum(q["interest_total"] for q in parts))
+    assert p["periodic_payment"] == {
+        "interest_only": parts[0]["periodic_payment"],
+        "amortized": parts[1]["periodic_payment"],
+    }
+
+
+def test_payments_exact():
+    for num_payments_interest_only in [0, 5, 37]:
+        loan = pl.Loan(
+            code="A",
+            principal=1234.56,
+            interest_rate=0.0731,
+            compounding_freq="continuously",
+            payment_freq="monthly",
+            num_payments=37,
+            num_payments_interest_only=num_payments_interest_only,
+            fee=10.5,
+            first_payment_date=dt.date(2018, 1, 31),
+        )
+        s = loan.payments(exact=True)
+        expect = loan.payments()
+        f = s["payment_schedule"]
+        assert f["principal_payment"].dtype == np.int64
+        assert f["principal_payment"].sum() == 123456
+        assert f["ending_balance"].iat[-1] == 0
+        assert s["payment_total"] == f["total_payment"].sum()
+        assert s["interest_total"] == f["interest_payment"].sum()
+
+        # Within a cent of the float path, except for the final payment
+        g = expect["payment_schedule"]
+        assert (
+            abs(f["total_payment"].iloc[:-1] - 100 * g["total_payment"].iloc[:-1]) <= 1
+        ).all()
+        assert f["payment_date"].equals(g["payment_date"])
+
+        # Array output
+        a = loan.payments(output="array", exact=True)["payment_schedule"]
+        assert a["interest_payment"].dtype == np.int64
+
+    with pytest.raises(ValueError):
+        loan.payments(decimals=None, exact=True)
+
+
+def test_reschedule():
+    for num_payments_interest_only in [0, 5, 24]:
+        loan = pl.Loan(
+            code="A",
+            principal=1000,
+            interest_rate=0.05,
+            compounding_freq="monthly",
+            payment_freq="monthly",
+            num_payments=24,
+            num_payments_interest_only=num_payments_interest_only,
+            fee=10,
+            first_payment_date=dt.date(2020, 1, 31),
+        )
+        f = loan.payments(decimals=None)["payment_schedule"]
+
+        # No events should change nothing
+        for t in [0, 3, 10]:
+            g = loan.reschedule(f, t, decimals=None)
+            cols = ["notes", "payment_date"]
+            assert np.allclose(g.drop(cols, axis=1), f.drop(cols, axis=1))
+            assert g["payment_date"].equals(f["payment_date"])
+
+        # Rate change after the interest only payments
+        t = 10 if num_payments_interest_only != 5 else 3
+        g = loan.reschedule(f, t, interest_rate=0.08, decimals=None)
+        assert g.iloc[:t].equals(f.iloc[:t])
+        assert g.shape[0] == 24
+        assert np.isclose(g["principal_payment"].sum(), 1000)
+        assert (g["interest_payment"].iloc[t:] > f["interest_payment"].iloc[t:]).all()
+
+        # Extra principal and term change
+        g = loan.reschedule(f, t, extra_principal=100, num_payments=30)
+        assert g.shape[0] == 30
+        assert g["payment_sequence"].tolist() == list(range(1, 31))
+        assert g["principal_payment"].iat[t] >= 100
+        assert np.isclose(g["principal_payment"].sum(), 1000)
+        assert g["ending_balance"].iat[-1] == 0
+
+        # Array output
+        a = loan.reschedule(loan.payments(output="array")["payment_schedule"], t)
+        assert isinstance(a, pl.Schedule)
+        assert len(a) == 24
+
+        # Exact output
+        h = loan.reschedule(loan.payments(exact=True)["payment_schedule"], t)
+        assert h["principal_payment"].dtype == np.int64
+        assert h["principal_payment"].sum() == 100_000
+
+        with pytest.raises(ValueError):
+            loan.reschedule(f, 24)
+        with pytest.raises(ValueError):
+            loan.reschedule(f, t, extra_principal=2000)
+
+    # Interest on the payment with an extra principal payment should accrue
+    # on its beginning balance
+    loan = pl.Loan(
+        code="A",
+        principal=10000,
+        interest_rate=0.05,
+        compounding_freq="monthly",
+        payment_freq="monthly",
+        num_payments=24,
+        num_payments_interest_only=0,
+        fee=0,
+        first_payment_date=dt.date(2020, 1, 31),
+    )
+    f = loan.payments(decimals=None)["payment_schedule"]
+    g = loan.reschedule(f, 0, extra_principal=1000, decimals=None)
+    assert np.allclose(g["interest_payment"], g["beginning_balance"] * 0.05 / 12)
+    assert np.isclose(
+        g["principal_payment"].iat[0], f["principal_payment"].iat[0] + 1000
+    )
+    assert np.isclose(g["principal_payment"].sum(), 10000)
+
+    # Chained events should keep an earlier rate change
+    for output in ["frame", "array"]:
+        f = loan.payments(decimals=None, output=output)["payment_schedule"]
+        f1 = loan.reschedule(f, 6, interest_rate=0.2, decimals=None)
+        f2 = loan.reschedule(f1, 12, extra_principal=100, decimals=None)
+        rate = np.where(np.arange(24) < 6, 0.05, 0.2)
+        assert np.allclose(f2["interest_payment"], f2["beginning_balance"] * rate / 12)
+        # Rescheduling before the rate change should use the earlier rate
+        f3 = loan.reschedule(f2, 3, decimals=None)
+        assert np.allclose(f3["interest_payment"], f["interest_payment"])
+
+
+def test_apr():
+    loan = pl.Loan(
+        code="A",
+        principal=1000,
+        interest_rate=0.12,
+        compounding_freq="monthly",
+        payment_freq="monthly",
+        num_payments=12,
+        num_payments_interest_only=0,
+        fee=0,
+        first_payment_date=dt.date(2018, 1, 31),
+    )
+    assert loan.apr() == pytest.approx(0.12)
+    assert loan.apr(effective=True) == pytest.approx(1.01**12 - 1)
+
+    # The fee raises the APR
+    loan = pl.Loan(**{k: getattr(loan, k) for k in loan.true_fields()} | {"fee": 20})
+    assert loan.apr() > 0.12
@@ -0,0 +1,358 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from .context import payulator, DATA_DIR
+import payulator as pl
+
+
+def build_loans():
+    loans = []
+    for freq in ["monthly", "quarterly", "fortnightly", "weekly", "daily"]:
+        for num_payments_interest_only in [0, 3, 12]:
+            loans.append(
+                pl.Loan(
+                    code=f"{freq}-{num_payments_interest_only}",
+                    principal=1000,
+                    interest_rate=0.05,
+                    payment_freq=freq,
+                    compounding_freq="continuously",
+                    num_payments=12,
+                    num_payments_interest_only=num_payments_interest_only,
+                    fee=10,
+                    first_payment_date=dt.date(2020, 1, 31),
+                )
+            )
+    loans.append(
+        pl.Loan(
+            code="zero-rate",
+            principal=1200,
+            interest_rate=0,
+            payment_freq="monthly",
+            compounding_freq="monthly",
+            num_payments=12,
+            num_payments_interest_only=0,
+            fee=0,
+            first_payment_date=dt.date(2020, 8, 31),
+        )
+    )
+    return loans
+
+
+def test_from_loans():
+    loans = build_loans()
+    book = pl.LoanBook.from_loans(loans)
+    assert len(book) == len(loans)
+    assert book.first_payment_date.dtype == np.dtype("datetime64[D]")
+
+    loans_2 = book.to_loans()
+    assert [loan.code for loan in loans_2] == [loan.code for loan in loans]
+    assert [loan.kind for loan in loans_2] == [loan.kind for loan in loans]
+
+    with pytest.raises(ValueError):
+        pl.LoanBook(**(book.to_frame().iloc[:3].to_dict("list") | {"fee": [0]}))
+
+
+def test_from_frame():
+    book = pl.LoanBook.from_loans(build_loans())
+    book_2 = pl.LoanBook.from_frame(book.to_frame().assign(bingo=1))
+    pd.testing.assert_frame_equal(book_2.to_frame(), book.to_frame())
+
+
+def test_schedule_arrays():
+    loans = build_loans()
+    a = pl.LoanBook.from_loans(loans).schedule_arrays()
+    assert (
+        a["offsets"].tolist()
+        == [0] + np.cumsum([loan.num_payments for loan in loans]).tolist()
+    )
+    for key in pl.SCHEDULE_COLUMNS:
+        if key != "notes":
+            assert a[key].shape == a["loan_index"].shape
+
+
+def test_payments():
+    loans = build_loans()
+    f = pl.LoanBook.from_loans(loans).payments()
+    assert f.columns.tolist() == ["code"] + pl.SCHEDULE_COLUMNS
+
+    # Should match the loan-by-loan payment schedules
+    for loan in loans:
+        expect = loan.payments()["payment_schedule"]
+        get = f.loc[lambda x: x["code"] == loan.code].drop("code", axis=1)
+        pd.testing.assert_frame_equal(
+            get.reset_index(drop=True),
+            expect.reset_index(drop=True),
+            check_dtype=False,
+            check_exact=True,
+        )
+
+
+def test_iter_chunks():
+    book = pl.LoanBook.from_loans(build_loans())
+    chunks = list(book.iter_chunks(50))
+    assert len(chunks) > 1
+    assert sum(len(b) for b in chunks) == len(book)
+    assert all(b.num_payments[:-1].sum() < 50 for b in chunks)
+    pd.testing.assert_frame_equal(
+        pd.concat([b.to_frame() for b in chunks], ignore_index=True),
+        book.to_frame(),
+    )
+
+
+def test_to_parquet(tmp_path):
+    ds = pytest.importorskip("pyarrow.dataset")
+
+    book = pl.LoanBook.from_loans(build_loans())
+    expect = book.payments()
+    for partition_by in ["code", "payment_month"]:
+        for as_decimal in [False, True]:
+            path = tmp_path / f"{partition_by}-{as_decimal}"
+            book.to_parquet(
+                path, partition_by=partition_by, chunk_size=50, as_decimal=as_decimal
+            )
+            f = (
+                ds.dataset(path, format="parquet", partitioning="hive")
+                .to_table()
+                .to_pandas()
+            )
+            assert f.shape[0] == expect.shape[0]
+            assert {d.name for d in path.iterdir()} == {
+                f"{partition_by}={v}" for v in f[partition_by].astype(str).unique()
+            }
+            assert f["payment_sequence"].dtype == np.int32
+            assert np.allclose(
+                f["total_payment"].astype(float).sum(), expect["total_payment"].sum()
+            )
+
+    # More codes per batch than the default PyArrow partition limit
+    f = book.to_frame().iloc[[0]]
+    f = f.loc[f.index.repeat(1100)].assign(code=[f"L{i}" for i in range(1100)])
+    big = pl.LoanBook.from_frame(f)
+    path = tmp_path / "big"
+    big.to_parquet(path)
+    assert len(list(path.iterdir())) == 1100
+
+    with pytest.raises(ValueError):
+        book.to_parquet(tmp_path / "bad", partition_by="bingo")
+
+
+def test_validate_loans():
+    f = pl.LoanBook.from_loans(build_loans()).to_frame()
+    assert pl.validate_loans(f).empty
+
+    g = f.astype({"first_payment_date": object})
+    g.loc[0, "principal"] = -1
+    g.loc[1, "payment_freq"] = "continuously"
+    g.loc[2, "num_payments_interest_only"] = 13
+    g.loc[3, "first_payment_date"] = "bingo"
+    g = g.astype({"code": object})
+    g.loc[4, "code"] = 1001
+    errors = pl.validate_loans(g)
+    assert errors.columns.tolist() == ["row", "column", "error"]
+    assert errors["row"].tolist() == [4, 0, 1, 3, 2]
+    assert errors["column"].tolist()[:4] == [
+        "code",
+        "principal",
+        "payment_freq",
+        "first_payment_date",
+    ]
+    assert errors["column"].isna().iat[-1]
+
+    with pytest.raises(ValueError):
+        pl.validate_loans(f.drop("fee", axis=1))
+
+
+def test_read_loans(tmp_path):
+    loans = build_loans()
+    f = pl.LoanBook.from_loans(loans).to_frame()
+
+    book, errors = pl.read_loans(f)
+    assert len(book) == len(loans)
+    assert errors.empty
+
+    path = tmp_path / "loans.csv"
+    f.to_csv(path, index=False)
+    book, errors = pl.read_loans(path)
+    pd.testing.assert_frame_equal(book.to_frame(), f)
+
+    # Numeric codes in CSV files should be read as strings
+    f.assign(code=range(1001, 1001 + len(f))).to_csv(path, index=False)
+    book, errors = pl.read_loans(path)
+    assert errors.empty
+    assert [loan.code for loan in book.to_loans()][:2] == ["1001", "1002"]
+
+    path = tmp_path / "loans.jsonl"
+    f.assign(first_payment_date=lambda x: x["first_payment_date"].astype(str)).to_json(
+        path, orient="records", lines=True
+    )
+    book, errors = pl.read_loans(path)
+    pd.testing.assert_frame_equal(book.to_frame(), f)
+
+    book, errors = pl.read_loans(DATA_DIR / "*loan_params.json")
+    assert len(book) == 1
+    assert set(errors["row"]) == {0}
+
+    with pytest.raises(ValueError):
+        pl.read_loans(tmp_path / "*.txt")
+
+
+def test_to_loans():
+    loans = build_loans()
+    book = pl.LoanBook.from_loans(loans)
+    assert book.to_loans(validate=False) == book.to_loans() == loans
+
+
+def test_payments_exact():
+    loans = build_loans()
+    f = pl.LoanBook.from_loans(loans).payments(exact=True)
+    assert f["principal_payment"].dtype == np.int64
+    assert (f.groupby("code")["ending_balance"].last() == 0).all()
+
+    # Should match the loan-by-loan exact payment schedules
+    for loan in loans:
+        expect = loan.payments(exact=True)["payment_schedule"]
+        get = f.loc[lambda x: x["code"] == loan.code].drop("code", axis=1)
+        pd.testing.assert_frame_equal(
+            get.reset_index(drop=True),
+            expect.reset_index(drop=True),
+            check_dtype=False,
+        )
+
+
+def test_reschedule():
+    loans = build_loans()
+    book = pl.LoanBook.from_loans(loans)
+
+    # No events at period 0 should yield the full schedules
+    a = book.reschedule(0)
+    full = book.schedule_arrays()
+    for key in a:
+        assert np.allclose(a[key].astype(float), full[key].astype(float))
+
+    # Should match the loan-by-loan rescheduling
+    periods = np.array([loan.num_payments // 2 for loan in loans])
+    rates = np.linspace(0.01, 0.1, len(loans))
+    a = book.reschedule(periods, interest_rate=rates, extra_principal=5)
+    assert np.diff(a["offsets"]).tolist() == (book.num_payments - periods).tolist()
+    for i, loan in enumerate(loans):
+        f = loan.payments(decimals=None)["payment_schedule"]
+        expect = loan.reschedule(
+            f, periods[i], interest_rate=rates[i], extra_principal=5, decimals=None
+        ).iloc[periods[i] :]
+        s = slice(a["offsets"][i], a["offsets"][i + 1])
+        for key in expect.columns.drop(["notes", "payment_date"]):
+            assert np.allclose(a[key][s], expect[key])
+        assert (a["payment_date"][s] == expect["payment_date"].values).all()
+
+    # Chained events should match repeated loan-by-loan rescheduling
+    periods_2 = periods + 3
+    rates_2 = rates + 0.02
+    n = book.num_payments + 6
+    b = book.reschedule(periods_2, interest_rate=rates_2, num_payments=n, schedule=a)
+    assert np.diff(b["offsets"]).tolist() == (n - periods_2).tolist()
+    for i, loan in enumerate(loans):
+        f = loan.payments(decimals=None)["payment_schedule"]
+        f = loan.reschedule(
+            f, periods[i], interest_rate=rates[i], extra_principal=5, decimals=None
+        )
+        expect = loan.reschedule(
+            f, periods_2[i], interest_rate=rates_2[i], num_payments=n[i], decimals=None
+        ).iloc[periods_2[i] :]
+        s = slice(b["offsets"][i], b["offsets"][i + 1])
+        for key in expect.columns.drop(["notes", "payment_date"]):
+            assert np.allclose(b[key][s], expect[key])
+        assert (b["payment_date"][s] == expect["payment_date"].values).all()
+
+    # Chained events should keep earlier rate changes
+    c = book.reschedule(periods_2, extra_principal=5, schedule=a)
+    for i, loan in enumerate(loans):
+        f = loan.payments(decimals=None)["payment_schedule"]
+        f = loan.reschedule(
+            f, periods[i], interest_rate=rates[i], extra_principal=5, decimals=None
+        )
+        expect = loan.reschedule(f, periods_2[i], extra_principal=5, decimals=None)
+        expect = expect.iloc[periods_2[i] :]
+        s = slice(c["offsets"][i], c["offsets"][i + 1])
+        for key in expect.columns.drop(["notes", "payment_date"]):
+            assert np.allclose(c[key][s], expect[key])
+    assert np.allclose(c["interest_rate"], rates)
+
+    # Chaining at period 0 of the full schedules changes nothing
+    c = book.reschedule(0, schedule=book.schedule_arrays())
+    for key in c:
+        assert np.allclose(c[key].astype(float), full[key].astype(float))
+
+    with pytest.raises(ValueError):
+        book.reschedule(book.num_payments)
+    with pytest.raises(ValueError):
+        book.reschedule(periods - 1, schedule=a)
+
+
+def test_apr():
+    loans = build_loans()
+    book = pl.LoanBook.from_loans(loans)
+    for effective in [False, True]:
+        assert np.allclose(
+            book.apr(effective=effective),
+            [loan.apr(effective=effective) for loan in loans],
+        )
+
+
+def test_npv():
+    loans = build_loans()
+    book = pl.LoanBook.from_loans(loans)
+    valuation_date = dt.date(2020, 3, 1)
+    curves = [0, 0.05, {0.5: 0.03, 5: 0.06}]
+    get = book.npv(curves, valuation_date)
+    assert get.shape == (len(loans), 3)
+
+    # At a zero rate, the remaining payment totals
+    for i, loan in enumerate(loans):
+        f = loan.payments(decimals=None)["payment_schedule"]
+        expect = f.loc[lambda x: x["payment_date"] > "2020-03-01", "total_payment"]
+        assert np.isclose(get[i, 0], expect.sum())
+
+    assert (get[:, 1] <= get[:, 0]).all()
+
+
+def test_shock_rates():
+    loans = build_loans()
+    book = pl.LoanBook.from_loans(loans)
+    shifts = [0, 0.01, 0.03]
+    for chunk_size in [10, 10_000_000]:
+        d = book.shock_rates(shifts, chunk_size=chunk_size)
+        assert d["principal_payment"].shape == (3, d["payment_date"].shape[0])
+        assert d["interest_total"].shape == (3, len(loans))
+
+        # Should match repricing loan by loan
+        for s, shift in enumerate(shifts):
+            shocked = [
+                pl.Loan(
+                    **{k: getattr(loan, k) for k in loan.true_fields()}
+                    | {"interest_rate": loan.interest_rate + shift}
+                )
+                for loan in loans
+            ]
+            f = pl.LoanBook.from_loans(shocked).payments(decimals=None)
+            g = f.groupby("payment_date").sum(numeric_only=True)
+            for key in [
+                "principal_payment",
+                "interest_payment",
+                "fee_payment",
+                "total_payment",
+            ]:
+                assert np.allclose(d[key][s], g[key])
+            expect = [loan.payments(decimals=None) for loan in shocked]
+            assert np.allclose(
+                d["interest_total"][s], [e["interest_total"] for e in expect]
+            )
+            assert np.allclose(
+                d["payment_total"][s], [e["payment_total"] for e in expect]
+            )
+
+    # Negative shifts
+    d = book.shock_rates([-0.01, 0])
+    assert (d["interest_total"][0] < d["interest_total"][1]).all()
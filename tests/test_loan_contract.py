@@ -1,11 +1,16 @@
+import io
 import json
+import os
+import sys
+import time
+import subprocess as sp
 import datetime as dt
 from copy import copy
 
 import pytest
 import voluptuous as vt
 
-from .context import payulator, DATA_DIR
+from .context import payulator, DATA_DIR, ROOT
 import payulator as pl
 
 
@@ -63,3 +68,112 @@ def test_read_loan_contract():
     path = DATA_DIR / "bad_loan_contract_params.json"
     with pytest.raises(vt.MultipleInvalid):
         pl.read_loan_contract(path)
+
+
+def test_import_time():
+    # Importing the package should not load the contract rendering stack,
+    # and should fit in a fixed time budget (seconds)
+    budget = 5
+    code = (
+        "import sys, time; t = time.perf_counter(); import payulator; "
+        "print(time.perf_counter() - t); "
+        "print(sorted({'weasyprint', 'jinja2'} & set(sys.modules)))"
+    )
+    cp = sp.run(
+        [sys.executable, "-c", code],
+        cwd=str(ROOT),
+        universal_newlines=True,
+        stdout=sp.PIPE,
+        check=True,
+    )
+    elapsed, loaded = cp.stdout.splitlines()
+    assert loaded == "[]"
+    assert float(elapsed) < budget
+
+
+def test_render_contracts(tmp_path):
+    contract = pl.read_loan_contract(DATA_DIR / "good_loan_contract_params.json")
+    bad_contract = pl.read_loan_contract(DATA_DIR / "good_loan_contract_params.json")
+    bad_contract.code = "no/such/dir"
+
+    for workers in [1, 2]:
+        out_dir = tmp_path / str(workers)
+        f = pl.render_contracts(
+            [contract, bad_contract], out_dir, formats=["rst"], workers=workers
+        )
+        assert f.columns.tolist() == ["code", "format", "path", "seconds", "error"]
+        assert f["code"].tolist() == [contract.code, bad_contract.code]
+        assert f["error"].isna().tolist() == [True, False]
+        assert (out_dir / f"{contract.code}.rst").exists()
+
+    with pytest.raises(ValueError):
+        pl.render_contracts([contract], tmp_path, formats=["docx"])
+
+
+def test_to_html():
+    contract = pl.read_loan_contract(DATA_DIR / "good_loan_contract_params.json")
+    html = contract.to_html()
+    assert html.startswith("<!DOCTYPE html>")
+    assert "Bootstrap v4.3.1" in html
+
+    # The in-process conversion should agree with the rst2html5 subprocess
+    assert html == contract.to_html(use_subprocess=True)
+
+
+@pytest.mark.slow
+def test_to_html_benchmark():
+    # Benchmark the in-process conversion against the rst2html5 subprocess
+    contract = pl.read_loan_contract(DATA_DIR / "good_loan_contract_params.json")
+    contract.to_html()
+    t = time.perf_counter()
+    contract.to_html(use_subprocess=True)
+    elapsed_cli = time.perf_counter() - t
+    t = time.perf_counter()
+    contract.to_html()
+    elapsed = time.perf_counter() - t
+    assert elapsed < elapsed_cli
+
+
+def test_get_template(tmp_path):
+    contract = pl.read_loan_contract(DATA_DIR / "good_loan_contract_params.json")
+    name = pl.TEMPLATE_NAME_BY_KIND[contract.kind]
+    assert pl.get_template(name) is pl.get_template(name)
+
+    # Override a default template and cache bytecode
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir()
+    path = template_dir / name
+    path.write_text("Contract {{ code }}")
+    try:
+        pl.configure_templates([template_dir], tmp_path / "cache")
+        assert contract.to_rst() == f"Contract {contract.code}"
+        assert list((tmp_path / "cache").iterdir())
+
+        # Recompile modified templates
+        path.write_text("Loan {{ code }}")
+        stat = path.stat()
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+        assert contract.to_rst() == f"Loan {contract.code}"
+    finally:
+        pl.configure_templates()
+
+    assert contract.to_rst().startswith("LOAN AGREEMENT")
+
+
+def test_to_pdf(tmp_path):
+    try:
+        import weasyprint
+    except (ImportError, OSError):
+        pytest.skip("WeasyPrint or its native libraries are not installed")
+
+    contract = pl.read_loan_contract(DATA_DIR / "good_loan_contract_params.json")
+    pdf = contract.to_pdf()
+    assert pdf.startswith(b"%PDF")
+
+    stream = io.BytesIO()
+    contract.to_pdf(stream)
+    assert stream.getvalue().startswith(b"%PDF")
+
+    path = tmp_path / "contract.pdf"
+    contract.to_pdf(path)
+    assert path.read_bytes().startswith(b"%PDF")
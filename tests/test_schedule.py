@@ -0,0 +1,66 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from .context import payulator
+import payulator as pl
+
+
+def build_schedule():
+    loan = pl.Loan(
+        code="",
+        principal=1000,
+        interest_rate=0.05,
+        payment_freq="monthly",
+        compounding_freq="quarterly",
+        num_payments=3 * 12,
+        num_payments_interest_only=12,
+        fee=10,
+        first_payment_date=dt.date(2018, 1, 31),
+    )
+    return loan, loan.payments(output="array")["payment_schedule"]
+
+
+def test_init():
+    __, s = build_schedule()
+    assert isinstance(s, pl.Schedule)
+    assert len(s) == 3 * 12
+    assert s.columns == list(pl.SCHEDULE_DTYPES)
+    assert s["fee_payment"][0] == 10
+    assert not hasattr(s, "__dict__")
+
+    columns = {c: s[c] for c in s.columns}
+    with pytest.raises(ValueError):
+        pl.Schedule(**(columns | {"fee_payment": [0]}))
+    with pytest.raises(ValueError):
+        pl.Schedule(**{c: v for c, v in columns.items() if c != "notes"}, bingo=1)
+    with pytest.raises(KeyError):
+        s["notes"]
+
+
+def test_round():
+    __, s = build_schedule()
+    t = s.round(0)
+    assert (t["interest_payment"] == np.round(s["interest_payment"])).all()
+    assert t["payment_date"] is s["payment_date"]
+
+
+def test_to_pandas():
+    loan, s = build_schedule()
+    f = s.to_pandas()
+    for c in s.columns:
+        assert np.shares_memory(f[c].to_numpy(), s[c])
+
+    expect = loan.payments()["payment_schedule"].drop("notes", axis=1)
+    pd.testing.assert_frame_equal(f, expect, check_dtype=False)
+    assert s.nbytes < f.assign(notes=np.nan).memory_usage(deep=True).sum()
+
+
+def test_to_arrow():
+    pytest.importorskip("pyarrow")
+    __, s = build_schedule()
+    t = s.to_arrow()
+    assert t.column_names == s.columns
+    assert np.shares_memory(t["total_payment"].to_numpy(), s["total_payment"])
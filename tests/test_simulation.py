@@ -0,0 +1,48 @@
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from .context import payulator
+from .test_loan_book import build_loans
+import payulator as pl
+
+
+def test_simulate_cashflows():
+    loans = build_loans()
+    book = pl.LoanBook.from_loans(loans)
+    a = book.schedule_arrays()
+    expect = (
+        pd.DataFrame({"payment_date": a["payment_date"], "cash": a["total_payment"]})
+        .groupby("payment_date")["cash"]
+        .sum()
+    )
+
+    # Without prepayments or defaults, every path is contractual
+    f = pl.simulate_cashflows(loans, 10, seed=1)
+    assert f.columns.tolist() == ["payment_date", "mean", "p5", "p50", "p95"]
+    assert np.allclose(f["mean"], expect.values)
+    assert np.allclose(f["p5"], f["p95"])
+
+    # Certain default in the first period recovers part of the principal
+    f = pl.simulate_cashflows(book, 10, cdr=1, recovery_rate=0.4, seed=1)
+    assert np.isclose(f["mean"].sum(), 0.4 * book.principal.sum())
+
+    # Certain prepayment in the first period pays off the principal
+    f = pl.simulate_cashflows(book, 10, cpr=1, seed=1)
+    first = a["payment_sequence"] == 1
+    assert np.isclose(
+        f["mean"].sum(),
+        a["total_payment"][first].sum() + a["ending_balance"][first].sum(),
+    )
+
+    # Reproducible across blocks, chunks, and workers
+    kwargs = dict(cpr=0.2, cdr=0.05, recovery_rate=0.5, seed=7, block_size=30)
+    f = pl.simulate_cashflows(book, 100, **kwargs)
+    g = pl.simulate_cashflows(book, 100, chunk_size=500, workers=2, **kwargs)
+    pd.testing.assert_frame_equal(f, g)
+    g = pl.simulate_cashflows(book, 100, chunk_size=1, **kwargs)
+    pd.testing.assert_frame_equal(f, g)
+    assert (f["p5"] <= f["p50"]).all() and (f["p50"] <= f["p95"]).all()
+    assert f["mean"].sum() < expect.sum()